@@ -1,5 +1,5 @@
 import time
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound
 import logging
 import json
 import os
@@ -8,16 +8,137 @@ import re
 from .DocTokenizer import DocTokenizer
 import html
 import hashlib
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_line(obj):
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree as lxml_etree
+    _LXML_UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+except ImportError:
+    lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
 
 logging.basicConfig(level=logging.INFO)
 
+# Content patterns used by _detect_language, one alternation per language, in detection priority order.
+# Each language is searched on its own: a single fused pattern scanned with finditer let a lower-priority
+# match (e.g. html) consume text that a higher-priority one (e.g. python) needed.
+_LANG_PATTERNS = (
+    ('python', re.compile(r'def\s+\w+\s*\(.*\):|import\s+\w+|from\s+\w+\s+import')),
+    ('javascript', re.compile(r'(?:const|let|var)\s+\w+\s*=|function\s+\w+\s*\(|=>')),
+    ('html', re.compile(r'<\w+>.*</\w+>|<(?:div|span|p|a|img)[^>]*>')),
+    ('css', re.compile(r'[\.\#]\w+\s*\{[^}]*\}|@media')),
+    ('sql', re.compile(r'SELECT|INSERT|UPDATE|DELETE|CREATE TABLE', re.IGNORECASE)),
+    ('cfamily', re.compile(r'(?:public|private|protected)\s+(?:static\s+)?\w+\s+\w+\s*\(')),
+    ('bash', re.compile(r'^#!.*sh|\$\s+')),
+)
+_RE_JAVA_PRINT = re.compile(r'System\.out\.println')
+_RE_CSHARP_PRINT = re.compile(r'Console\.WriteLine')
+_RE_CPP_STD = re.compile(r'std::')
+
+# Class names that mark a pre/code element as a highlighted code block
+_CODE_CLASS_RE = re.compile(r'code|highlight|syntax|language-|hljs|prettyprint|codemirror', re.IGNORECASE)
+
+# Language hints in highlighter class names: "language-xxx", or a known language name as a whole word
+_LANG_CLASS_RE = re.compile(r'language-([\w+-]+)|\b(python|javascript|js|java|cpp|csharp|ruby|go|php|html|css|sql|bash|shell)\b')
+
+# Function/method name patterns used by _generate_block_name
+_NAME_PATTERNS = {
+    'python': re.compile(r'(def|class)\s+(\w+)'),
+    'javascript': re.compile(r'(function|class)\s+(\w+)|const\s+(\w+)\s*=\s*(?:function|\(.*?\)\s*=>)'),
+    'java': re.compile(r'(?:public|private|protected|static)?\s*(?:class|void|String|int|boolean)\s+(\w+)'),
+    'go': re.compile(r'func\s+(\w+)'),
+    'ruby': re.compile(r'def\s+(\w+)'),
+    'php': re.compile(r'function\s+(\w+)'),
+    'csharp': re.compile(r'(?:public|private|protected|static)?\s*(?:class|void|string|int|bool)\s+(\w+)')
+}
+_GENERIC_NAME_PATTERNS = (
+    re.compile(r'(?:function|def|class|void|public|private)\s+(\w+)'),  # General function/class
+    re.compile(r'(?:const|let|var)\s+(\w+)\s*='),                       # Variable declarations
+    re.compile(r'@\w+\s*\(\s*["\'](\w+)["\']'),                         # Decorators with names
+    re.compile(r'#\s*(\w+)'),                                           # Comments with single words
+)
+
+# Name/path normalization
+_RE_NON_WORD = re.compile(r'[^\w\s]')
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_UNSAFE_PATH_CHARS = re.compile(r'[^\w_-]')
+
+
+def _make_soup(markup, **kwargs):
+    '''Build a BeautifulSoup tree with the C-backed lxml builder, falling back to html.parser when lxml is not installed.
+    '''
+    try:
+        return BeautifulSoup(markup, 'lxml', **kwargs)
+    except FeatureNotFound:
+        return BeautifulSoup(markup, 'html.parser', **kwargs)
+
+
+def _lxml_text(element, separator=""):
+    '''Text of an lxml element and its descendants, joined in C by itertext (the lxml counterpart of Tag.get_text).
+    '''
+    return separator.join(element.itertext())
+
+
+def _lxml_find_all(root, attrs):
+    '''lxml counterpart of soup.find_all for a single {"name": tag} or {attribute: value} selector.
+    '''
+    key, value = next(iter(attrs.items()))
+    if key == "name":
+        return list(root.iter(value))
+    if key == "class":
+        # Like BeautifulSoup, match either one class name or the whole class string
+        return [el for el in root.iter(lxml_etree.Element)
+                if el.get("class") is not None and (value in el.get("class").split() or el.get("class") == value)]
+    return [el for el in root.iter(lxml_etree.Element) if el.get(key) == value]
+
+
+# Html2Text instance owned by the current worker process, created on first use
+_worker_html2text = None
+
+
+def _process_one(args):
+    '''Extract the text dictionary of one html record; module level so ProcessPoolExecutor can pickle it.
+    '''
+    global _worker_html2text
+    if _worker_html2text is None:
+        _worker_html2text = Html2Text()
+    html_dict, target_content_tag, target_tag_list, is_get_all_text, process_code_blocks = args
+    return _worker_html2text.get_text_dict(
+        html_dict=html_dict,
+        target_content_tag=target_content_tag,
+        target_tag_list=target_tag_list,
+        is_get_all_text=is_get_all_text,
+        process_code_blocks=process_code_blocks
+    )
+
 
 class Html2Text():
     '''From html extract text content.
     '''
 
     def __init__(self):
-        pass
+        # Built once and shared by every get_text_dict call (DocTokenizer keeps no per-document state)
+        self._doc_tokenizer = DocTokenizer()
 
     def html2text(self,
                   target_content_tag={},
@@ -25,7 +146,10 @@ class Html2Text():
                   html_dir=None,
                   text_dir=None,
                   mode="w",
-                  is_get_all_text=False
+                  is_get_all_text=False,
+                  process_code_blocks=False,
+                  max_workers=None,
+                  batch_size=1024
                   ):
         assert isinstance(target_content_tag, dict), "target_content_tag should be in dictionary format!"
         assert len(target_content_tag.keys()) <= 1, "target_content_tag attribute dictionary can only specify a unique element!"
@@ -34,33 +158,40 @@ class Html2Text():
             assert len(_.keys()) <= 1, "Target_tag_list attribute dictionary in the list can only specify a unique element!"
         # Create save directory
         os.makedirs(os.path.dirname(text_dir), exist_ok=True)
-        # Read file
+        # Read file lazily, one html record at a time
         logging.info("Reading files...")
-        html_dict_list = self.read_html_jsonl(html_dir)
-        url_nums = len(html_dict_list)
-        logging.info(f"Total {url_nums} html URLs")
-        # Process each line of html data: extract content text and specified tag content from html
-        text_dict_list = []
-        for html_dict in tqdm(html_dict_list, mininterval=1):
-            # Whether to get all text content
-            text_dict = self.get_text_dict(
-                html_dict=html_dict,
-                target_content_tag=target_content_tag,
-                target_tag_list=target_tag_list,
-                is_get_all_text=is_get_all_text
+        html_dicts = self.read_html_jsonl(html_dir)
+        # Process each line of html data in a process pool: extract content text and specified tag content from html
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            text_dicts = self._map_text_dicts(
+                executor=executor,
+                html_dicts=tqdm(html_dicts, mininterval=1),
+                task_args=(target_content_tag, target_tag_list, is_get_all_text, process_code_blocks),
+                batch_size=batch_size
             )
-            text_dict_list.append(text_dict)
-        logging.info("Saving text content extracted from html...")
-        self.save_text_jsonl(json_list=text_dict_list,
-                             file_path=text_dir,
-                             mode=mode)
+            logging.info("Extracting and saving text content from html...")
+            url_nums = self.save_text_jsonl(json_list=text_dicts,
+                                            file_path=text_dir,
+                                            mode=mode)
+        logging.info(f"Total {url_nums} html URLs")
         logging.info(f"Save successful! Address: {text_dir}")
 
+    def _map_text_dicts(self, executor, html_dicts, task_args, batch_size=1024):
+        '''
+        Yield text dictionaries in input order, submitting at most batch_size records to the pool at a time
+        '''
+        while True:
+            batch = list(islice(html_dicts, batch_size))
+            if not batch:
+                break
+            yield from executor.map(_process_one, [(html_dict, *task_args) for html_dict in batch], chunksize=32)
+
     def get_text_dict(self,
                       html_dict={},
                       target_content_tag={},
                       target_tag_list=[],
-                      is_get_all_text=True
+                      is_get_all_text=True,
+                      process_code_blocks=False
                       ):
         # Format definition
         assert isinstance(target_content_tag, dict), "target_content_tag should be in dictionary format!"
@@ -86,43 +217,104 @@ class Html2Text():
                 text_dict['all_text'] = ''
             return text_dict
             
-        # Create BeautifulSoup object
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Process pre code blocks, add ``` quotes
-        self._process_code_blocks(soup)
+        # Parse with lxml directly when installed so text is pulled with C-level itertext, otherwise with BeautifulSoup,
+        # then, if requested, process pre code blocks, add ``` quotes.
+        # The lxml matcher only compares literal strings; regex, True or list selector values need BeautifulSoup's find_all
+        literal_selectors = all(isinstance(value, str)
+                                for selector in [target_content_tag, *target_tag_list] for value in selector.values())
+        root = self._parse_lxml(html_content) if literal_selectors else None
+        if root is not None:
+            if process_code_blocks:
+                self._process_code_blocks_lxml(root)
+            document, find_all_text = root, self.lxml_find_all_text
+        else:
+            soup = _make_soup(html_content)
+            if process_code_blocks:
+                self._process_code_blocks(soup)
+            document, find_all_text = soup, self.soup_find_all_text
         
         # Extract HTML text content
-        doc_tokenizer = DocTokenizer()
+        doc_tokenizer = self._doc_tokenizer
         text_dict = {}
         text_dict['url'] = url
         text_dict['host_url'] = host_url
         
         # Extract webpage title, set to empty if not exists
-        try:
-            text_dict['title'] = soup.title.text.strip()
-        except:
-            text_dict['title'] = None
+        if root is not None:
+            title = root.find('.//title')
+            text_dict['title'] = _lxml_text(title).strip() if title is not None else None
+        else:
+            title = soup.title
+            text_dict['title'] = title.get_text().strip() if title else None
             
         # Whether to extract all text, regardless of tag
         if is_get_all_text:
-            all_text = soup.get_text(separator="\n", strip=False)
+            if root is not None:
+                all_text = _lxml_text(root, "\n")
+            else:
+                all_text = soup.get_text(separator="\n", strip=False)
             text_dict['all_text'] = doc_tokenizer.doc_process(all_text)
             
         # Extract body tag, can be extracted according to the tag's class or according to the tag name
         if target_content_tag:
-            text_dict["content"] = self.soup_find_all_text(soup=soup, doc_tokenizer=doc_tokenizer, attrs=target_content_tag)
+            text_dict["content"] = find_all_text(document, doc_tokenizer, attrs=target_content_tag)
             
         # Extract html tag content, each tag is saved independently as a field
         for target_tag in target_tag_list:
             if target_tag:
                 # Extract target tag name
-                tag_ = list(target_tag.values())[0]
+                tag_ = next(iter(target_tag.values()))
                 # Extract target tag content
-                text_dict[tag_] = self.soup_find_all_text(soup, doc_tokenizer, attrs=target_tag)
+                text_dict[tag_] = find_all_text(document, doc_tokenizer, attrs=target_tag)
                 
         return text_dict
 
+    def _parse_lxml(self, html_content):
+        """Parse html into an lxml tree without script/style/template content; None when lxml is missing or fails"""
+        if lxml_html is None:
+            return None
+        # lxml parses bytes without an extra conversion step: already-decoded text is re-encoded once and parsed as utf-8,
+        # raw bytes are left to lxml's own charset detection
+        if isinstance(html_content, str):
+            html_content, parser = html_content.encode('utf-8', 'replace'), _LXML_UTF8_PARSER
+        else:
+            parser = None
+        try:
+            root = lxml_html.document_fromstring(html_content, parser=parser)
+        except (lxml_etree.ParserError, ValueError):
+            return None
+        # BeautifulSoup's get_text leaves these strings out as well
+        lxml_etree.strip_elements(root, 'script', 'style', 'template', with_tail=False)
+        return root
+
+    def _process_code_blocks_lxml(self, root):
+        """Process and format code blocks in an lxml tree, mirroring _process_code_blocks"""
+        for block in list(root.iter('pre', 'code')):
+            # Skip empty or very small blocks
+            block_text = ''.join(s.strip() for s in block.itertext())
+            if not block_text or len(block_text) < 10:
+                continue
+                
+            # Detect language from class or parent class, then from content
+            parent = block.getparent()
+            class_lists = [(el.get('class') or '').split() for el in (block, parent) if el is not None]
+            language = self._detect_language_from_classes(class_lists) or self._detect_language_from_text(_lxml_text(block))
+            language_tag = f"```{language}\n" if language else "```\n"
+            
+            # Format the code block content
+            if block.tag == 'pre':
+                code_element = block.find('.//code')
+                content = _lxml_text(code_element if code_element is not None else block, '\n')
+            else:
+                content = _lxml_text(block, '\n')
+            code_content = self._format_code_text(content, is_pre=block.tag == 'pre')
+            
+            # Only modify if we have content: replace the block content with the fenced version
+            if code_content and len(code_content.strip()) > 0:
+                for child in list(block):
+                    block.remove(child)
+                block.text = f"\n{language_tag}{code_content}\n```\n"
+
     def _process_code_blocks(self, soup):
         """Process and format code blocks in the HTML"""
         # Find all code blocks
@@ -130,7 +322,8 @@ class Html2Text():
         
         for block in code_blocks:
             # Skip empty or very small blocks
-            if not block.get_text(strip=True) or len(block.get_text(strip=True)) < 10:
+            block_text = block.get_text(strip=True)
+            if not block_text or len(block_text) < 10:
                 continue
                 
             # Detect language from class or parent class
@@ -165,36 +358,12 @@ class Html2Text():
             else:
                 # Use the pre element content
                 content = element.get_text('\n', strip=False)
-                
-            # Clean up common HTML entity issues
-            content = html.unescape(content)
-            
-            # Fix indentation by finding common leading whitespace
-            lines = content.split('\n')
-            if len(lines) > 1:
-                # Find minimum indentation level (skip empty lines)
-                min_indent = float('inf')
-                for line in lines:
-                    if line.strip():  # Skip empty lines
-                        indent = len(line) - len(line.lstrip())
-                        min_indent = min(min_indent, indent)
-                
-                # Remove common indentation if found
-                if min_indent < float('inf'):
-                    fixed_lines = []
-                    for line in lines:
-                        if line.strip():  # Only process non-empty lines
-                            fixed_lines.append(line[min_indent:])
-                        else:
-                            fixed_lines.append(line)  # Preserve empty lines
-                    content = '\n'.join(fixed_lines)
-                
-            return content
+            return self._format_code_text(content, is_pre=True)
             
         # For <code> tags not inside <pre>
         elif element.name == 'code':
             content = element.get_text('\n', strip=False)
-            return html.unescape(content)
+            return self._format_code_text(content, is_pre=False)
             
         # Fallback - reconstruct content from element parts
         lines = []
@@ -209,69 +378,60 @@ class Html2Text():
         content = ''.join(lines)
         return html.unescape(content)
 
+    def _format_code_text(self, content, is_pre):
+        """Clean up raw code text; <pre> content also has its common indentation removed"""
+        # Clean up common HTML entity issues
+        content = html.unescape(content)
+        
+        # Fix indentation by removing common leading whitespace (whitespace-only lines are ignored)
+        if is_pre and '\n' in content:
+            content = textwrap.dedent(content)
+            
+        return content
+
     def _detect_language(self, element):
         """Detect programming language from code element"""
         # Check element and parent classes for language hints
-        for el in [element, element.parent]:
-            if el and el.get('class'):
-                for cls in el.get('class'):
-                    if isinstance(cls, str):
-                        # Common patterns for code highlighting libraries
-                        if cls.startswith('language-'):
-                            return cls.split('-')[1]
-                        if 'language-' in cls:
-                            parts = cls.split('language-')
-                            if len(parts) > 1 and parts[1]:
-                                return parts[1].split()[0]  # Get first word after language-
-                        # Look for language name in class
-                        for lang in ['python', 'javascript', 'js', 'java', 'cpp', 'csharp', 'ruby', 'go', 'php', 'html', 'css', 'sql', 'bash', 'shell']:
-                            if lang in cls.lower():
-                                return lang
+        class_lists = [el.get('class') for el in [element, element.parent] if el]
+        language = self._detect_language_from_classes(class_lists)
+        if language:
+            return language
         
         # Check content for language patterns
-        code_text = element.get_text()
+        return self._detect_language_from_text(element.get_text())
+
+    def _detect_language_from_classes(self, class_lists):
+        """Detect programming language from the class lists of a code element and its parent"""
+        for classes in class_lists:
+            if classes:
+                # One regex pass over all class names of the element
+                blob = ' '.join(cls for cls in classes if isinstance(cls, str)).lower()
+                match = _LANG_CLASS_RE.search(blob)
+                if match:
+                    return match.group(1) or match.group(2)
+        return None
+
+    def _detect_language_from_text(self, code_text):
+        """Detect programming language from the text of a code element"""
+        # First language (in priority order) whose patterns match
+        best = None
+        for name, pattern in _LANG_PATTERNS:
+            if pattern.search(code_text):
+                best = name
+                break
         
-        # Python
-        if re.search(r'def\s+\w+\s*\(.*\):', code_text) or \
-           re.search(r'import\s+\w+', code_text) or \
-           re.search(r'from\s+\w+\s+import', code_text):
-            return 'python'
-            
-        # JavaScript
-        if re.search(r'(const|let|var)\s+\w+\s*=', code_text) or \
-           re.search(r'function\s+\w+\s*\(', code_text) or \
-           re.search(r'=>', code_text):
-            return 'javascript'
-            
-        # HTML
-        if re.search(r'<\w+>.*</\w+>', code_text) or \
-           re.search(r'<(div|span|p|a|img)[^>]*>', code_text):
-            return 'html'
-            
-        # CSS
-        if re.search(r'[\.\#]\w+\s*\{[^}]*\}', code_text) or \
-           re.search(r'@media', code_text):
-            return 'css'
-            
-        # SQL
-        if re.search(r'SELECT|INSERT|UPDATE|DELETE|CREATE TABLE', code_text, re.IGNORECASE):
-            return 'sql'
-            
         # Java/C++/C#
-        if re.search(r'(public|private|protected)\s+(static\s+)?\w+\s+\w+\s*\(', code_text):
+        if best == 'cfamily':
             # More specific patterns could distinguish between them
-            if re.search(r'System\.out\.println', code_text):
+            if _RE_JAVA_PRINT.search(code_text):
                 return 'java'
-            if re.search(r'Console\.WriteLine', code_text):
+            if _RE_CSHARP_PRINT.search(code_text):
                 return 'csharp'
-            if re.search(r'std::', code_text):
+            if _RE_CPP_STD.search(code_text):
                 return 'cpp'
             return 'java'  # Default guess among the C-family
-            
-        # Shell/Bash
-        if re.search(r'^#!.*sh', code_text) or \
-           re.search(r'\$\s+', code_text):
-            return 'bash'
+        if best:
+            return best
         
         # Default fallback
         return 'text'
@@ -279,46 +439,56 @@ class Html2Text():
     def soup_find_all_text(self, soup, doc_tokenizer, attrs):
         assert isinstance(attrs, dict), "attrs should be in dictionary format!"
         assert len(attrs.keys()) == 1, "attrs attribute dictionary can only specify a unique element!"
-        if list(attrs.keys())[0] == "name":
+        if next(iter(attrs)) == "name":
             _tags = soup.find_all(name=attrs["name"])
         else:
             _tags = soup.find_all(attrs=attrs)
-        tags_text = ""
+        parts = []
         for _tag in _tags:
             tag_text = _tag.get_text(separator="\n", strip=False)
-            tag_text = doc_tokenizer.doc_process(tag_text)
-            tags_text += tag_text.strip() + "\n\n"
-        return tags_text
+            parts.append(doc_tokenizer.doc_process(tag_text).strip())
+        # Each tag's text is followed by a blank line
+        return "\n\n".join(parts) + "\n\n" if parts else ""
+
+    def lxml_find_all_text(self, root, doc_tokenizer, attrs):
+        assert isinstance(attrs, dict), "attrs should be in dictionary format!"
+        assert len(attrs.keys()) == 1, "attrs attribute dictionary can only specify a unique element!"
+        parts = []
+        for _tag in _lxml_find_all(root, attrs):
+            tag_text = _lxml_text(_tag, "\n")
+            parts.append(doc_tokenizer.doc_process(tag_text).strip())
+        # Each tag's text is followed by a blank line
+        return "\n\n".join(parts) + "\n\n" if parts else ""
 
     def read_html_jsonl(self, file_name=None):
         '''
-        Read html jsonl file
+        Read html jsonl file, yielding one html dictionary per line
         '''
-        html_dict_list = []
-        with open(file_name, "r", encoding="utf-8") as f:
+        with open(file_name, "rb") as f:
             for k, line in enumerate(f):
                 try:
-                    line = json.loads(line)
-                    html_dict_list.append(line)
+                    yield _json_loads(line)
                 except json.JSONDecodeError:
                     logging.warning(f"Error parsing JSON at line {k+1}")
-        return html_dict_list
 
     def save_text_jsonl(self, json_list=[], file_path=None, mode="w"):
         '''
-        Save json_list as jsonl format file
+        Save json_list (any iterable of dictionaries) as jsonl format file, return the number of lines written
         '''
-        with open(file_path, mode, encoding="utf-8") as f:
+        count = 0
+        # Binary mode with a large buffer: records are encoded straight to utf-8 bytes and flushed in big chunks
+        with open(file_path, mode.replace("b", "") + "b", buffering=1 << 20) as f:
             for line in json_list:
-                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                f.write(_json_dumps_line(line))
+                count += 1
+        return count
 
     def extract_code_blocks(self, soup):
         """Extract code blocks with language detection and metadata"""
         code_blocks = []
         
         # Find all code blocks with multiple selectors to ensure good coverage
-        for block in soup.find_all(['pre', 'code'], class_=lambda c: c and any(
-            x in str(c).lower() for x in ['code', 'highlight', 'syntax', 'language-', 'hljs', 'prettyprint', 'CodeMirror'])):
+        for block in soup.find_all(['pre', 'code'], class_=_CODE_CLASS_RE):
             
             code_text = block.get_text(strip=True)
             if not code_text or len(code_text) < 10:  # Skip empty or very short blocks
@@ -370,22 +540,74 @@ class Html2Text():
             
         return context
     
+    def extract_code_blocks_lexbor(self, tree):
+        """Extract code blocks from a selectolax Lexbor tree, mirroring extract_code_blocks"""
+        code_blocks = []
+        
+        # One document-order pass collects code blocks together with the headings and captions around them
+        headings = []
+        captions = []
+        candidates = []
+        for node in tree.css('pre, code, h1, h2, h3, h4, h5, h6, figcaption'):
+            if node.tag == 'figcaption':
+                captions.append(node.text(strip=True))
+            elif node.tag in ('pre', 'code'):
+                cls = node.attributes.get('class')
+                if cls and _CODE_CLASS_RE.search(cls):
+                    candidates.append((node, len(headings), len(captions)))
+            else:
+                headings.append(node.text(strip=True))
+        
+        for block, heading_count, caption_count in candidates:
+            code_text = block.text(strip=True)
+            if not code_text or len(code_text) < 10:  # Skip empty or very short blocks
+                continue
+                
+            # Detect language from the block and parent classes, then from content
+            parent = block.parent
+            class_lists = [(el.attributes.get('class') or '').split() for el in (block, parent) if el is not None]
+            language = self._detect_language_from_classes(class_lists) or self._detect_language_from_text(block.text())
+            
+            # Context: closest preceding heading, enclosing section/div, next (else previous) caption
+            context = {}
+            if heading_count:
+                context['heading'] = headings[heading_count - 1]
+            while parent is not None and parent.tag not in ('section', 'div'):
+                parent = parent.parent
+            if parent is not None and (parent.attributes.get('class') or parent.attributes.get('id')):
+                context['section'] = parent.attributes.get('id') or ' '.join((parent.attributes.get('class') or '').split())
+            if caption_count < len(captions):
+                context['caption'] = captions[caption_count]
+            elif captions:
+                context['caption'] = captions[-1]
+            
+            # Generate meaningful name based on content
+            block_name = self._generate_block_name(code_text, language, context)
+            
+            # Properly preserve code formatting
+            if block.tag == 'pre':
+                code_element = block.css_first('code')
+                content = (code_element or block).text(separator='\n', strip=False)
+            else:
+                content = block.text(separator='\n', strip=False)
+            formatted_code = self._format_code_text(content, is_pre=block.tag == 'pre')
+            
+            code_blocks.append({
+                'language': language,
+                'name': block_name,
+                'content': formatted_code,
+                'context': context,
+                'type': block.tag,
+                'size': len(formatted_code)
+            })
+        
+        return code_blocks
+    
     def _generate_block_name(self, code_text, language, context):
         """Generate a meaningful name for the code block"""
-        # More advanced function/method detection for different languages
-        patterns = {
-            'python': r'(def|class)\s+(\w+)',
-            'javascript': r'(function|class)\s+(\w+)|const\s+(\w+)\s*=\s*(?:function|\(.*?\)\s*=>)',
-            'java': r'(?:public|private|protected|static)?\s*(?:class|void|String|int|boolean)\s+(\w+)',
-            'go': r'func\s+(\w+)',
-            'ruby': r'def\s+(\w+)',
-            'php': r'function\s+(\w+)',
-            'csharp': r'(?:public|private|protected|static)?\s*(?:class|void|string|int|bool)\s+(\w+)'
-        }
-        
         # Try language-specific pattern first
-        if language in patterns:
-            match = re.search(patterns[language], code_text)
+        if language in _NAME_PATTERNS:
+            match = _NAME_PATTERNS[language].search(code_text)
             if match:
                 # Get the capture group that contains the name
                 name = next((g for g in match.groups()[1:] if g), None)
@@ -393,67 +615,57 @@ class Html2Text():
                     return f"{name}_{language}"
         
         # Generic function/method detection as fallback
-        generic_patterns = [
-            r'(?:function|def|class|void|public|private)\s+(\w+)',  # General function/class
-            r'(?:const|let|var)\s+(\w+)\s*=',                       # Variable declarations
-            r'@\w+\s*\(\s*["\'](\w+)["\']',                         # Decorators with names
-            r'#\s*(\w+)',                                           # Comments with single words
-        ]
-        
-        for pattern in generic_patterns:
-            match = re.search(pattern, code_text)
+        for pattern in _GENERIC_NAME_PATTERNS:
+            match = pattern.search(code_text)
             if match and match.group(1):
                 return f"{match.group(1)}_{language}"
         
         # Use section heading if available
         if context and 'heading' in context:
-            # Clean and normalize the heading
-            heading = re.sub(r'[^\w\s]', '', context['heading']).strip()
-            heading = re.sub(r'\s+', '_', heading).lower()
+            heading = self._clean_block_name(context['heading'])
             if heading:
                 return f"{heading[:30]}_{language}"
         
         # Use page section/article title if available
         if context and 'section' in context:
-            section = re.sub(r'[^\w\s]', '', context['section']).strip()
-            section = re.sub(r'\s+', '_', section).lower()
+            section = self._clean_block_name(context['section'])
             if section:
                 return f"{section[:20]}_{language}"
             
         # Use first line of code if it's short enough
-        first_line = code_text.split('\n')[0].strip()
+        first_line = code_text.partition('\n')[0].strip()
         if 10 <= len(first_line) <= 40:
-            clean_name = re.sub(r'[^\w\s]', '', first_line).strip()
-            clean_name = re.sub(r'\s+', '_', clean_name).lower()
+            clean_name = self._clean_block_name(first_line)
             if clean_name:
                 return f"{clean_name[:25]}_{language}"
         
         # Hash the content for a unique identifier as last resort
-        content_hash = hashlib.md5(code_text[:100].encode()).hexdigest()[:8]
+        content_hash = hashlib.blake2b(code_text[:100].encode("utf-8", "ignore"), digest_size=4).hexdigest()
         return f"{language}_snippet_{content_hash}"
 
-    def extract_and_save_code_blocks(self, html_dict, code_dir):
-        """Extract code blocks from HTML and save to files with proper formatting"""
+    def _clean_block_name(self, text):
+        """Normalize text into a lowercase, underscore-separated name without punctuation"""
+        text = _RE_NON_WORD.sub('', text).strip()
+        return _RE_WHITESPACE.sub('_', text).lower()
+
+    def extract_and_save_code_blocks(self, html_dict, code_dir, use_selectolax=True):
+        """Extract code blocks from HTML and save to files with proper formatting.
+        Uses the selectolax Lexbor parser when installed; use_selectolax=False forces the BeautifulSoup path."""
         if not html_dict.get('text'):
             return []  # No content to process
             
-        soup = BeautifulSoup(html_dict['text'], 'html.parser')
         url = html_dict['url']
         
         # Extract domain for folder naming
-        domain = url.split("//")[1].split("/")[0].replace(".", "_")
+        parsed_url = urlsplit(url)
+        domain = parsed_url.netloc.replace(".", "_")
         
-        # Extract the last meaningful segment from URL path for folder name
-        path_parts = url.split("//")[1].split("/")
-        page_folder = "main"
-        
-        for part in path_parts:
-            if part and part not in ["", domain] and "#" not in part:
-                # Get the last meaningful path segment
-                page_folder = part
+        # The last meaningful segment of the URL path (query and fragment excluded) names the page folder
+        path_parts = [part for part in parsed_url.path.split("/") if part]
+        page_folder = path_parts[-1] if path_parts else "main"
         
         # Clean folder name
-        page_folder = re.sub(r'[^\w_-]', '_', page_folder)
+        page_folder = _RE_UNSAFE_PATH_CHARS.sub('_', page_folder)
         if not page_folder:
             page_folder = "main"
         
@@ -462,7 +674,12 @@ class Html2Text():
         os.makedirs(page_dir, exist_ok=True)
         
         # Extract code blocks
-        code_blocks = self.extract_code_blocks(soup)
+        if use_selectolax and LexborHTMLParser is not None:
+            code_blocks = self.extract_code_blocks_lexbor(LexborHTMLParser(html_dict['text']))
+        else:
+            # Full parse: language hints come from the block's parent classes and the section context from its
+            # div/section ancestors, so the tree can't be strained down to the code blocks
+            code_blocks = self.extract_code_blocks(_make_soup(html_dict['text']))
         
         # Save the code blocks
         saved_files = []
@@ -482,16 +699,12 @@ class Html2Text():
             
             file_path = os.path.join(page_dir, file_name)
             
-            # Write the file with URL and code content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"{url}\n\n")
-                language_tag = f"```{block['language']}\n" if block['language'] and block['language'] != 'text' else "```\n"
-                f.write(language_tag)
-                # Write the content with proper formatting
-                f.write(block['content'])
-                if not block['content'].endswith('\n'):
-                    f.write("\n")
-                f.write("```\n")
+            # Build the file (URL and fenced code content) in memory and write it with a single call
+            language_tag = f"```{block['language']}\n" if block['language'] and block['language'] != 'text' else "```\n"
+            content_end = "" if block['content'].endswith('\n') else "\n"
+            file_bytes = "".join([url, "\n\n", language_tag, block['content'], content_end, "```\n"]).encode('utf-8')
+            with open(file_path, 'wb') as f:
+                f.write(file_bytes)
             
             saved_files.append({
                 'url': url,
@@ -507,11 +720,12 @@ class Html2Text():
         try:
             if not url:
                 return ""
-            parts = url.split("//")
-            if len(parts) > 1:
-                host_parts = parts[1].split("/")
-                return f"{parts[0]}//{host_parts[0]}"
+            parsed_url = urlsplit(url)
+            if parsed_url.netloc:
+                # Scheme-relative URLs ("//host/path") keep their form
+                scheme = f"{parsed_url.scheme}:" if parsed_url.scheme else ""
+                return f"{scheme}//{parsed_url.netloc}"
             return url
-        except Exception as e:
+        except ValueError as e:
             logging.warning(f"Error extracting host URL from {url}: {str(e)}")
-            return url
\ No newline at end of file
+            return url
@@ -1,16 +1,187 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from functools import partial
+from collections import deque, defaultdict
 import threading
-from queue import Queue
 import logging
 import time
 import os
 import json
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
 from urllib.parse import urljoin, urlparse
 import random
 import re
 import html
+import hashlib
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_line(obj):
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps_line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode('utf-8')
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree as lxml_etree
+    # Plain str results: "smart" strings would keep each page's whole tree alive through the URL sets
+    _HREF_XPATH = lxml_etree.XPath('//a/@href', smart_strings=False)
+except ImportError:
+    lxml_html = None
+
+try:
+    import xxhash
+
+    def _code_digest(data):
+        return xxhash.xxh3_64_intdigest(data)
+except ImportError:
+    def _code_digest(data):
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+# Pages larger than this (after decompression) are not downloaded in full or parsed
+_MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+# Link schemes and in-page anchors that never lead to another crawlable page
+_SKIP_HREF_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:', 'data:')
+
+# html_to_text only looks at these tags, so nothing else needs to be built into the tree
+_TEXT_STRAINER = SoupStrainer(['title', 'main', 'article', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p'])
+
+# Class names that mark a highlighted code block, and the main content container of a page
+_CODE_CLASS_RE = re.compile(r'code|highlight|syntax|language-|hljs|prettyprint|codemirror', re.IGNORECASE)
+# Saved code block filenames: heading.md or heading_N.md
+_CODE_FILE_RE = re.compile(r'(.+?)(?:_(\d+))?\.md')
+_MAIN_CLASS_RE = re.compile(r'content|main|article|documentation|docs', re.IGNORECASE)
+
+# Language names recognised as class tokens, mapped to the name used in the fenced code block
+_LANG_CANON = {lang: lang for lang in (
+    'python', 'javascript', 'js', 'java', 'cpp', 'csharp', 'ruby', 'go', 'php', 'html', 'css', 'sql', 'bash', 'shell')}
+_LANG_CANON.update({'py': 'python', 'rb': 'ruby', 'cs': 'csharp', 'c++': 'cpp', 'sh': 'bash'})
+_LANG_SET = frozenset(_LANG_CANON)
+
+# Content patterns used by _detect_language, compiled once instead of per code block
+_RE_PY_DEF = re.compile(r'def\s+\w+\s*\(.*\):')
+_RE_PY_IMPORT = re.compile(r'import\s+\w+|from\s+\w+\s+import')
+_RE_JS_DECL = re.compile(r'(const|let|var)\s+\w+\s*=')
+_RE_JS_FN = re.compile(r'function\s+\w+\s*\(|=>')
+_RE_HTML = re.compile(r'<\w+>.*</\w+>|<(div|span|p|a|img)[^>]*>')
+_RE_CSS = re.compile(r'[\.\#]\w+\s*\{[^}]*\}|@media')
+_RE_SQL = re.compile(r'SELECT|INSERT|UPDATE|DELETE|CREATE TABLE', re.IGNORECASE)
+_RE_ACCESS = re.compile(r'(public|private|protected)\s+(static\s+)?\w+\s+\w+\s*\(')
+_RE_JAVA_PRINT = re.compile(r'System\.out\.println')
+_RE_CSHARP_PRINT = re.compile(r'Console\.WriteLine')
+_RE_CPP_STD = re.compile(r'std::')
+_RE_SHEBANG = re.compile(r'^#!.*sh|\$\s+')
+
+def _make_soup(markup, **kwargs):
+    """Parse with the C-backed lxml builder, falling back to html.parser when lxml is missing"""
+    try:
+        return BeautifulSoup(markup, 'lxml', **kwargs)
+    except FeatureNotFound:
+        return BeautifulSoup(markup, 'html.parser', **kwargs)
+
+def _page_hrefs(soup, html_content):
+    """Return the raw href values of every link on a page, in document order"""
+    if lxml_html is not None:
+        # One C-level XPath query instead of building a bs4 Tag per anchor
+        try:
+            return _HREF_XPATH(lxml_html.document_fromstring(html_content))
+        except (lxml_etree.ParserError, ValueError):
+            pass
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+def _extract_host_url(url):
+    """Extract host URL from a full URL"""
+    try:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+    except:
+        return url
+
+def _extract_text(soup, full_markup=None):
+    """Return the (title, content) pair of a parsed page.
+    full_markup is the page source when soup was parsed with a strainer, for the all-text fallback."""
+    # Extract title
+    title = None
+    if soup.title:
+        title = soup.title.get_text(strip=True)
+    
+    # Extract main content using a hierarchical approach
+    content = ""
+    
+    # First try to find main content containers
+    main_elements = soup.find_all(['main', 'article', 'div'], class_=_MAIN_CLASS_RE)
+    
+    if main_elements:
+        # Use the largest content block. A nested match never has more text than the match containing it,
+        # and find_all lists the outer one first, so only the outermost matches need their text measured
+        outermost = []
+        outermost_ids = set()
+        for el in main_elements:
+            if not any(id(parent) in outermost_ids for parent in el.parents):
+                outermost.append(el)
+                outermost_ids.add(id(el))
+        largest = max(outermost, key=lambda x: len(x.get_text()))
+        content = largest.get_text('\n', strip=True)
+    
+    # If no main content found, extract from headings and paragraphs
+    if not content:
+        for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']):
+            content += tag.get_text(strip=True) + "\n\n"
+    
+    # If still no content, use all text but skip scripts and styles
+    if not content:
+        if full_markup is not None:
+            # The strained tree only holds the tags read above - this fallback needs the whole page
+            soup = _make_soup(full_markup)
+        # Remove script and style elements
+        for script in soup(['script', 'style']):
+            script.extract()
+        content = soup.get_text('\n', strip=True)
+    
+    return title, content
+
+def _process_html_line(line, reparse=False):
+    """Turn one line of the HTML JSONL file into a serialized text entry; module level so worker processes can pickle it"""
+    try:
+        html_dict = _json_loads(line)
+        
+        url = html_dict.get('url', '')
+        
+        if not reparse and 'content' in html_dict:
+            # The crawl already extracted the text from its own parse of the page
+            title, content = html_dict.get('title'), html_dict['content']
+        else:
+            html_content = html_dict.get('text', '')
+            if not html_content:
+                return None
+            
+            # Parse only the tags text extraction reads
+            title, content = _extract_text(_make_soup(html_content, parse_only=_TEXT_STRAINER), html_content)
+        
+        # Create text data entry, already encoded so the parent process only writes bytes
+        text_entry = {
+            'url': url,
+            'host_url': html_dict.get('host_url', _extract_host_url(url)),
+            'title': title,
+            'content': content
+        }
+        return _json_dumps_line(text_entry)
+        
+    except json.JSONDecodeError:
+        logging.warning(f"Error parsing JSON in HTML file")
+    except Exception as e:
+        logging.warning(f"Error processing HTML: {str(e)}")
+    return None
 
 class WebCrawler:
     def __init__(self):
@@ -18,12 +189,27 @@ class WebCrawler:
         self.lock = threading.Lock()
         self.html_data = []
         self.code_data = []
+        # 64-bit digests of every code block saved so far, shared across pages and threads
+        self._code_seen = set()
+        # Per-thread code block buffers, registered once per thread and merged into code_data after each crawl
+        self._tls = threading.local()
+        self._code_buffers = []
+        # Next free suffix per save_dir and heading, seeded from the directory listing the first time it is seen
+        self._dir_counters = defaultdict(lambda: defaultdict(int))
+        # One pooled session for the whole crawl: keep-alive connections skip the TCP/TLS handshake on every page
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            # Every compression urllib3 can decode here: gzip/deflate, plus br/zstd when brotli/zstandard are installed
+            'Accept-Encoding': ACCEPT_ENCODING,
+        })
         
-    def crawl(self, start_url, max_depth=3, max_threads=20, max_pages=float('inf')):
+    def crawl(self, start_url, max_depth=3, max_threads=20, max_pages=float('inf'), max_page_bytes=_MAX_PAGE_BYTES):
         """Crawl a website starting from the given URL with no page limit"""
-        url_queue = Queue()
+        # Only the dispatcher adds to this set, so workers never contend on it
         processed_urls = set()
-        url_queue.put((start_url, 1))  # (url, depth)
         
         # Extract domain for staying within site
         parsed_url = urlparse(start_url)
@@ -40,134 +226,185 @@ class WebCrawler:
         os.makedirs(os.path.dirname(text_dir), exist_ok=True)
         os.makedirs(code_dir, exist_ok=True)
         
-        # Open HTML file for writing
-        with open(html_dir, 'w', encoding='utf-8') as html_file:
-            pass  # Create/clear the file
+        # Size the connection pool to the thread count so every worker can keep its own connection alive
+        adapter = HTTPAdapter(
+            pool_connections=max_threads,
+            pool_maxsize=max_threads,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Keep one buffered handle open for the whole crawl; workers only queue serialized lines
+        html_file = open(html_dir, 'wb', buffering=1 << 20)
+        pending_lines = deque()
+        flush_every = 500
+        
+        def flush_html_lines():
+            """Write all queued HTML records in one batch"""
+            batch = []
+            while pending_lines:
+                batch.append(pending_lines.popleft())
+            if batch:
+                with self.lock:
+                    html_file.writelines(batch)
             
         logging.info(f"Starting crawl of {start_url} with max depth {max_depth}, threads: {max_threads}")
         
         def process_url(url, depth):
-            """Process a single URL"""
-            if url in processed_urls:
-                return None
-                
-            # Mark URL as processed
-            with self.lock:
-                processed_urls.add(url)
-                
+            """Process a single URL and return the same-domain URLs found on it"""
             try:
-                # Get page content
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                }
-                
+                # Get page content over the pooled session (headers are set on the session)
                 # Add timeout to prevent hanging
-                response = requests.get(url, headers=headers, timeout=30)
+                response = self.session.get(url, timeout=30, stream=True)
                 if response.status_code != 200:
+                    response.close()
                     logging.warning(f"Failed to retrieve {url}: Status {response.status_code}")
                     return None
                     
-                html_content = response.text
+                content = self._read_page(response, max_page_bytes)
+                if content is None:
+                    logging.warning(f"Skipping {url}: page is larger than {max_page_bytes} bytes")
+                    return None
+                encoding = response.encoding or 'utf-8'
+                try:
+                    html_content = content.decode(encoding, errors='replace')
+                except LookupError:
+                    html_content = content.decode('utf-8', errors='replace')
+                
+                # Parse the raw bytes with the encoding requests already settled on, so lxml does not re-sniff it
+                soup = _make_soup(content, from_encoding=encoding)
+                
+                # Extract code blocks with improved formatting
+                subfolder = urlparse(url).path.strip('/').split('/', 1)[0] or "main"
+                code_blocks = self.extract_code_blocks(soup, url, code_dir, subfolder=subfolder)
+                if code_blocks:
+                    buf = getattr(self._tls, 'code', None)
+                    if buf is None:
+                        buf = self._tls.code = []
+                        with self.lock:
+                            self._code_buffers.append(buf)
+                    buf.extend(code_blocks)
+                
+                # Collect the same-domain links of the page
+                links = []
+                for href in _page_hrefs(soup, html_content):
+                    # Skip fragments, javascript, mailto, tel and data links in one C-level check
+                    if href.startswith(_SKIP_HREF_PREFIXES):
+                        continue
+                        
+                    # Convert to absolute URL; root-relative and same-domain absolute links
+                    # without dot segments need no urljoin
+                    if href.startswith('/') and not href.startswith('//') and '/.' not in href:
+                        next_url = domain_prefix + href
+                    elif href.startswith(domain_prefix) and '/.' not in href:
+                        next_url = href
+                    else:
+                        next_url = urljoin(url, href)
+                    
+                    # Remove fragment
+                    next_url = next_url.partition('#')[0]
+                    
+                    # Only follow links to the same domain
+                    if next_url.startswith(domain_prefix):
+                        links.append(next_url)
+                links = list(dict.fromkeys(links))
                 
-                # Parse HTML
-                soup = BeautifulSoup(html_content, 'html.parser')
+                # Extract the text now, from this parse, so html_to_text does not have to parse the page again
+                # (done last because the fallback path strips script and style tags from the soup)
+                title, content = _extract_text(soup)
                 
-                # Save HTML content
+                # Save HTML content together with the extracted text and links
                 html_data = {
                     'url': url,
                     'text': html_content,
                     'status': True,
-                    'host_url': domain_prefix  # Add host_url for consistency
+                    'host_url': domain_prefix,  # Add host_url for consistency
+                    'title': title,
+                    'content': content,
+                    'links': links
                 }
                 
-                with self.lock:
-                    with open(html_dir, 'a', encoding='utf-8') as html_file:
-                        html_file.write(json.dumps(html_data, ensure_ascii=False) + "\n")
-                    logging.info(f"Saved HTML for {url}")
+                # Serialize outside any lock; deque appends are thread-safe
+                pending_lines.append(_json_dumps_line(html_data))
+                logging.info(f"Saved HTML for {url}")
                 
-                # Extract code blocks with improved formatting
-                code_blocks = self.extract_code_blocks(soup, url, code_dir)
-                if code_blocks:
-                    with self.lock:
-                        self.code_data.extend(code_blocks)
-                
-                # If not at max depth, find and queue new URLs
+                # If not at max depth, hand the unseen links to the dispatcher to schedule
+                new_urls = []
                 if depth < max_depth:
-                    links = soup.find_all('a', href=True)
-                    
-                    new_urls = 0
-                    for link in links:
-                        href = link['href']
-                        
-                        # Skip fragments, javascript, and mailto links
-                        if href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
-                            continue
-                            
-                        # Convert to absolute URL
-                        next_url = urljoin(url, href)
-                        
-                        # Remove fragment
-                        next_url = next_url.split('#')[0]
-                        
-                        # Only follow links to the same domain
-                        if next_url.startswith(domain_prefix) and next_url not in processed_urls:
-                            with self.lock:
-                                url_queue.put((next_url, depth + 1))
-                                new_urls += 1
-                                
-                                # No max pages limit check
-                    
-                    if new_urls > 0:
-                        logging.info(f"Added {new_urls} new URLs from {url} (depth {depth})")
+                    new_urls = [next_url for next_url in links if next_url not in processed_urls]
+                    if new_urls:
+                        logging.info(f"Found {len(new_urls)} new URLs on {url} (depth {depth})")
                 
-                return html_data
+                return new_urls
                 
             except Exception as e:
                 logging.warning(f"Error processing {url}: {str(e)}")
                 return None
         
-        # Process the starting URL first to ensure it works
-        first_result = process_url(start_url, 1)
-        if not first_result:
-            logging.error(f"Failed to process starting URL {start_url}")
-            
-        # Use thread pool to process remaining URLs
-        with ThreadPoolExecutor(max_workers=max_threads) as executor:
-            futures = []
-            
-            # Set a maximum execution time to prevent infinite running
-            start_time = time.time()
-            max_execution_time = 14400  # 4 hours to allow more time for complete crawling
+        try:
+            # Process the starting URL first to ensure it works
+            processed_urls.add(start_url)
+            first_result = process_url(start_url, 1)
+            if first_result is None:
+                logging.error(f"Failed to process starting URL {start_url}")
             
-            while (not url_queue.empty() or futures) and time.time() - start_time < max_execution_time:
-                # Add new tasks to the thread pool
-                while not url_queue.empty() and len(futures) < max_threads:
-                    url, depth = url_queue.get()
-                    if url not in processed_urls:
-                        futures.append(executor.submit(process_url, url, depth))
+            # Use thread pool to process remaining URLs
+            with ThreadPoolExecutor(max_workers=max_threads) as executor:
+                # Map each in-flight future to the depth of the page it fetches
+                pending = {}
+                
+                def schedule(urls, depth):
+                    for next_url in urls:
+                        if next_url not in processed_urls:
+                            processed_urls.add(next_url)
+                            pending[executor.submit(process_url, next_url, depth)] = depth
                 
-                # Handle completed tasks
-                completed = []
-                for future in futures:
-                    if future.done():
-                        completed.append(future)
+                schedule(first_result or (), 2)
                 
-                for future in completed:
-                    futures.remove(future)
-                    try:
-                        future.result()  # Get result to catch exceptions
-                    except Exception as e:
-                        logging.error(f"Thread error: {str(e)}")
+                # Set a maximum execution time to prevent infinite running
+                start_time = time.time()
+                max_execution_time = 14400  # 4 hours to allow more time for complete crawling
                 
-                # Add a small delay if no tasks completed
-                if not completed:
-                    time.sleep(0.1)
+                last_flush = time.time()
+                
+                while pending:
+                    # Block until at least one page finishes, then schedule what it found right away
+                    remaining = max_execution_time - (time.time() - start_time)
+                    done, _ = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+                    
+                    # Handle timeout case: drop everything not yet started
+                    if not done:
+                        for future in pending:
+                            future.cancel()
+                        logging.warning(f"Crawl of {start_url} timed out after {max_execution_time/60} minutes")
+                        break
+                    
+                    for future in done:
+                        depth = pending.pop(future)
+                        try:
+                            new_urls = future.result()
+                        except Exception as e:
+                            logging.error(f"Thread error: {str(e)}")
+                            continue
+                        if new_urls:
+                            schedule(new_urls, depth + 1)
                     
-            # Handle timeout case
-            if time.time() - start_time >= max_execution_time:
-                logging.warning(f"Crawl of {start_url} timed out after {max_execution_time/60} minutes")
+                    # Write out a full batch, or whatever has queued up over the last second
+                    if len(pending_lines) >= flush_every or time.time() - last_flush >= 1.0:
+                        flush_html_lines()
+                        last_flush = time.time()
+                
+        finally:
+            # Flush and close on normal shutdown, timeout or error so html_to_text sees every page
+            flush_html_lines()
+            html_file.close()
+            
+            # Merge the per-thread code block buffers; a fresh thread-local starts the next crawl empty
+            for buf in self._code_buffers:
+                self.code_data.extend(buf)
+            self._code_buffers = []
+            self._tls = threading.local()
                 
         # Extract text from HTML
         self.html_to_text(html_dir, text_dir)
@@ -175,23 +412,52 @@ class WebCrawler:
         # Save code metadata
         if self.code_data:
             code_metadata_path = os.path.join(os.path.dirname(code_dir), f"{domain_safe}_code_metadata.jsonl")
-            with open(code_metadata_path, 'w', encoding='utf-8') as f:
-                for item in self.code_data:
-                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            with open(code_metadata_path, 'wb', buffering=1 << 20) as f:
+                f.writelines(_json_dumps_line(item) for item in self.code_data)
         
         logging.info(f"Crawl complete: Processed {len(processed_urls)} URLs for {base_domain}")
         return processed_urls
     
-    def extract_code_blocks(self, soup, url, code_dir):
-        """Extract code blocks from HTML content with improved formatting"""
+    def _read_page(self, response, max_bytes):
+        """Read a streamed response body, or return None once it grows past max_bytes"""
+        with response:
+            # Trust a declared length first so oversized pages are not downloaded at all
+            declared = response.headers.get('Content-Length', '')
+            if declared.isdigit() and int(declared) > max_bytes:
+                return None
+            
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                body += chunk
+                if len(body) > max_bytes:
+                    return None
+            return bytes(body)
+    
+    def extract_code_blocks(self, soup, url, code_dir, *, subfolder=None):
+        """Extract code blocks from HTML content with improved formatting.
+        subfolder is the first path segment of url (or "main"); callers that already split the URL pass it in."""
         code_blocks = []
         
         # Find all code blocks using multiple selectors to increase coverage
-        code_elements = soup.find_all(['pre', 'code'], class_=lambda c: c and any(
-            x in str(c).lower() for x in ['code', 'highlight', 'syntax', 'language-', 'hljs', 'prettyprint', 'CodeMirror']))
+        code_elements = soup.find_all(['pre', 'code'], class_=_CODE_CLASS_RE)
+        if not code_elements:
+            return code_blocks
+        
+        # One document-order pass records the nearest preceding heading of every pre/code element,
+        # replacing a find_previous walk over the whole preceding tree per block
+        preceding_heading = {}
+        last_heading = None
+        for el in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'code']):
+            if el.name in ('pre', 'code'):
+                preceding_heading[id(el)] = last_heading
+            else:
+                last_heading = el
         
-        # Track processed code to avoid duplicates
-        processed_content = set()
+        # Every block on the page lands in the same subfolder, named after the first path segment
+        if subfolder is None:
+            subfolder = urlparse(url).path.strip('/').split('/', 1)[0] or "main"
+        save_dir = os.path.join(code_dir, subfolder)
+        dir_ready = False
         
         for i, element in enumerate(code_elements):
             # Skip empty or very short blocks
@@ -199,25 +465,23 @@ class WebCrawler:
             if not code_text or len(code_text.strip()) < 15:
                 continue
                 
-            # Use content hash to avoid duplicates
-            content_hash = hash(code_text)
-            if content_hash in processed_content:
+            # Use a 64-bit content digest to skip blocks already saved from any page
+            content_hash = _code_digest(code_text.encode('utf-8', 'ignore'))
+            if content_hash in self._code_seen:
                 continue
-                
-            processed_content.add(content_hash)
+            with self.lock:
+                if content_hash in self._code_seen:
+                    continue
+                self._code_seen.add(content_hash)
             
             # Detect language
             language = self._detect_language(element)
             
             # Find a heading for context
             heading = None
-            current = element
-            while current and not heading:
-                header = current.find_previous(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                if header:
-                    heading = header.get_text(strip=True)
-                    break
-                current = current.parent
+            header = preceding_heading.get(id(element))
+            if header:
+                heading = header.get_text(strip=True)
             
             # Fallback for when no heading is found
             if not heading:
@@ -240,30 +504,18 @@ class WebCrawler:
             safe_heading = re.sub(r'\s+', '_', safe_heading)
             safe_heading = safe_heading or f"code_example_{i+1}"
             
-            # Parse domain for folder structure
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.replace('.', '_')
-            
-            # Path components for subfolder
-            path = parsed_url.path.strip('/')
-            if path:
-                path_parts = path.split('/')
-                subfolder = path_parts[0] if path_parts else "main"
-            else:
-                subfolder = "main"
+            # Create directory once per page, in case it was removed since the last one
+            if not dir_ready:
+                os.makedirs(save_dir, exist_ok=True)
+                dir_ready = True
             
-            # Create directory
-            save_dir = os.path.join(code_dir, subfolder)
-            os.makedirs(save_dir, exist_ok=True)
-            
-            # Create filename
-            count = 1
-            base_filename = f"{safe_heading}.md"
-            filename = base_filename
-            
-            while os.path.exists(os.path.join(save_dir, filename)):
-                filename = f"{safe_heading}_{count}.md"
-                count += 1
+            # Create filename: heading.md, then heading_1.md, heading_2.md, ...
+            with self.lock:
+                if save_dir not in self._dir_counters:
+                    self._seed_dir_counters(save_dir)
+                count = self._dir_counters[save_dir][safe_heading]
+                self._dir_counters[save_dir][safe_heading] = count + 1
+            filename = f"{safe_heading}.md" if count == 0 else f"{safe_heading}_{count}.md"
             
             # Save code to file
             file_path = os.path.join(save_dir, filename)
@@ -285,6 +537,20 @@ class WebCrawler:
         
         return code_blocks
     
+    def _seed_dir_counters(self, save_dir):
+        """Start the filename counters of a directory seen for the first time past the files already in it,
+        so a later run never overwrites blocks saved by an earlier one. Called with self.lock held."""
+        counters = self._dir_counters[save_dir]
+        for name in os.listdir(save_dir):
+            match = _CODE_FILE_RE.fullmatch(name)
+            if not match:
+                continue
+            stem = name[:-3]
+            counters[stem] = max(counters[stem], 1)
+            if match.group(2) is not None:
+                base = match.group(1)
+                counters[base] = max(counters[base], int(match.group(2)) + 1)
+    
     def _preserve_code_formatting(self, element):
         """Extract code text while preserving proper code formatting"""
         # For <pre> tags, get text with line breaks preserved
@@ -343,152 +609,101 @@ class WebCrawler:
     
     def _detect_language(self, element):
         """Detect programming language from code element"""
-        # Check element and parent classes for language hints
+        # Check element and parent classes for language hints, one hash lookup per class token
         for el in [element, element.parent]:
             if el and el.get('class'):
                 for cls in el.get('class'):
-                    if isinstance(cls, str):
-                        # Common patterns for code highlighting libraries
-                        if cls.startswith('language-'):
-                            return cls.split('-')[1]
-                        if 'language-' in cls:
-                            parts = cls.split('language-')
-                            if len(parts) > 1 and parts[1]:
-                                return parts[1].split()[0]  # Get first word after language-
-                        # Look for language name in class
-                        for lang in ['python', 'javascript', 'js', 'java', 'cpp', 'csharp', 'ruby', 'go', 'php', 'html', 'css', 'sql', 'bash', 'shell']:
-                            if lang in cls.lower():
-                                return lang
+                    if not isinstance(cls, str):
+                        continue
+                    cls_lower = cls.lower()
+                    # An explicit language-xxx class names the language directly
+                    _, marker, lang = cls_lower.partition('language-')
+                    if marker and lang:
+                        return lang
+                    # Otherwise look each dash-separated token up in the alias table
+                    for tok in cls_lower.replace('-', ' ').split():
+                        if tok in _LANG_SET:
+                            return _LANG_CANON[tok]
         
         # Check content for language patterns
         code_text = element.get_text()
         
         # Python
-        if re.search(r'def\s+\w+\s*\(.*\):', code_text) or \
-           re.search(r'import\s+\w+', code_text) or \
-           re.search(r'from\s+\w+\s+import', code_text):
+        if _RE_PY_DEF.search(code_text) or _RE_PY_IMPORT.search(code_text):
             return 'python'
             
         # JavaScript
-        if re.search(r'(const|let|var)\s+\w+\s*=', code_text) or \
-           re.search(r'function\s+\w+\s*\(', code_text) or \
-           re.search(r'=>', code_text):
+        if _RE_JS_DECL.search(code_text) or _RE_JS_FN.search(code_text):
             return 'javascript'
             
         # HTML
-        if re.search(r'<\w+>.*</\w+>', code_text) or \
-           re.search(r'<(div|span|p|a|img)[^>]*>', code_text):
+        if _RE_HTML.search(code_text):
             return 'html'
             
         # CSS
-        if re.search(r'[\.\#]\w+\s*\{[^}]*\}', code_text) or \
-           re.search(r'@media', code_text):
+        if _RE_CSS.search(code_text):
             return 'css'
             
         # SQL
-        if re.search(r'SELECT|INSERT|UPDATE|DELETE|CREATE TABLE', code_text, re.IGNORECASE):
+        if _RE_SQL.search(code_text):
             return 'sql'
             
         # Java/C++/C#
-        if re.search(r'(public|private|protected)\s+(static\s+)?\w+\s+\w+\s*\(', code_text):
+        if _RE_ACCESS.search(code_text):
             # More specific patterns could distinguish between them
-            if re.search(r'System\.out\.println', code_text):
+            if _RE_JAVA_PRINT.search(code_text):
                 return 'java'
-            if re.search(r'Console\.WriteLine', code_text):
+            if _RE_CSHARP_PRINT.search(code_text):
                 return 'csharp'
-            if re.search(r'std::', code_text):
+            if _RE_CPP_STD.search(code_text):
                 return 'cpp'
             return 'java'  # Default guess among the C-family
             
         # Shell/Bash
-        if re.search(r'^#!.*sh', code_text) or \
-           re.search(r'\$\s+', code_text):
+        if _RE_SHEBANG.search(code_text):
             return 'bash'
         
         # Default fallback
         return 'text'
     
-    def html_to_text(self, html_file, text_file):
-        """Extract text content from HTML files"""
-        text_data = []
+    def html_to_text(self, html_file, text_file, max_workers=None, batch_size=1000, reparse=False):
+        """Extract text content from HTML files.
+        Records that already carry crawl-time title/content are copied in this process; with reparse=True
+        every page is parsed again in worker processes."""
+        count = 0
+        process_line = partial(_process_html_line, reparse=reparse)
         
         try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        html_dict = json.loads(line)
-                        
-                        url = html_dict.get('url', '')
-                        html_content = html_dict.get('text', '')
-                        
-                        if not html_content:
-                            continue
-                        
-                        # Parse HTML
-                        soup = BeautifulSoup(html_content, 'html.parser')
-                        
-                        # Extract title
-                        title = None
-                        if soup.title:
-                            title = soup.title.get_text(strip=True)
-                        
-                        # Extract main content using a hierarchical approach
-                        content = ""
-                        
-                        # First try to find main content containers
-                        main_elements = soup.find_all(['main', 'article', 'div'], 
-                                                    class_=lambda c: c and any(x in str(c).lower() 
-                                                                             for x in ['content', 'main', 'article', 'documentation', 'docs']))
-                        
-                        if main_elements:
-                            # Use the largest content block
-                            largest = max(main_elements, key=lambda x: len(x.get_text()))
-                            content = largest.get_text('\n', strip=True)
-                        
-                        # If no main content found, extract from headings and paragraphs
-                        if not content:
-                            for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']):
-                                content += tag.get_text(strip=True) + "\n\n"
-                        
-                        # If still no content, use all text but skip scripts and styles
-                        if not content:
-                            # Remove script and style elements
-                            for script in soup(['script', 'style']):
-                                script.extract()
-                            content = soup.get_text('\n', strip=True)
-                        
-                        # Create text data entry
-                        text_entry = {
-                            'url': url,
-                            'host_url': html_dict.get('host_url', self._extract_host_url(url)),
-                            'title': title,
-                            'content': content
-                        }
-                        
-                        text_data.append(text_entry)
-                        
-                    except json.JSONDecodeError:
-                        logging.warning(f"Error parsing JSON in HTML file")
-                    except Exception as e:
-                        logging.warning(f"Error processing HTML: {str(e)}")
-            
-            # Save text data
-            with open(text_file, 'w', encoding='utf-8') as f:
-                for entry in text_data:
-                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            with open(html_file, 'rb') as f, \
+                    open(text_file, 'wb', buffering=1 << 20) as out:
+                if not reparse:
+                    # Copying title/content is far cheaper than pickling each full-HTML line to a worker and back
+                    for line in f:
+                        entry_line = process_line(line)
+                        if entry_line:
+                            out.write(entry_line)
+                            count += 1
+                else:
+                    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                        # Hand the pool one bounded batch of lines at a time so memory stays flat on large crawls
+                        while True:
+                            lines = list(islice(f, batch_size))
+                            if not lines:
+                                break
+                            # Write each entry as it comes back instead of collecting the whole crawl in memory
+                            for entry_line in executor.map(process_line, lines, chunksize=64):
+                                if entry_line:
+                                    out.write(entry_line)
+                                    count += 1
             
-            logging.info(f"Extracted text from {len(text_data)} HTML documents")
+            logging.info(f"Extracted text from {count} HTML documents")
             
         except Exception as e:
             logging.error(f"Error processing HTML file: {str(e)}")
     
     def _extract_host_url(self, url):
         """Extract host URL from a full URL"""
-        try:
-            parsed = urlparse(url)
-            return f"{parsed.scheme}://{parsed.netloc}"
-        except:
-            return url
+        return _extract_host_url(url)
     
     def crawl_all(self, urls, max_depth=3, max_threads=20):
         """Crawl multiple URLs sequentially"""
@@ -1,12 +1,14 @@
 import requests
 from fake_useragent import UserAgent
 import time
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
 from urllib.parse import urljoin, urlsplit
 import logging
 import json
 import os
 from requests.exceptions import Timeout, RequestException
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
 import re
 import math
 from selenium import webdriver
@@ -17,24 +19,305 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from selenium.webdriver.common.by import By
 import random
+import asyncio
+import sqlite3
+from email.utils import parsedate_to_datetime
+import threading
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import ssl
+import urllib3
+from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Certificates are not verified (see _insecure_ssl_context), so the per-request warning is only noise
+urllib3.disable_warnings(InsecureRequestWarning)
+
+# Statuses worth retrying; any other error status is treated as permanent
+_RETRY_STATUS = frozenset((408, 429, 500, 502, 503, 504))
+
+# get_link_sub_url_list only needs anchors that carry an href
+_LINK_STRAINER = SoupStrainer('a', href=True)
+
+# Subresources Chrome does not fetch for Selenium: only the document and its scripts matter for page_source
+_BLOCKED_URLS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.svg', '*.woff', '*.woff2', '*.ttf', '*.otf',
+                 '*.css', '*.mp4', '*.webm', '*.mp3']
+
+# Traces of client-side rendered apps whose static HTML is only a shell
+_SPA_MARKERS = ('<div id="root"', '<div id="app"', '__NEXT_DATA__', 'window.__NUXT__', 'ng-version=')
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+
+    def _json_dumps_line(obj):
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def _json_dumps_line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+@lru_cache(maxsize=4096)
+def _split_host_url_cached(url):
+    '''
+    scheme://netloc of url, memoized because the same pages and hosts are split over and over during a crawl
+    '''
+    parsed_url = urlsplit(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+def _retry_after_seconds(value):
+    '''
+    Seconds until the time given by a Retry-After header, which is either a delay in seconds or an HTTP date; None if unparsable
+    '''
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate_limit(headers):
+    '''
+    Read (remaining, reset_seconds) from X-RateLimit-*, RateLimit-* or Retry-After response headers; None for what is absent
+    '''
+    remaining = headers.get('X-RateLimit-Remaining') or headers.get('RateLimit-Remaining')
+    reset = headers.get('X-RateLimit-Reset') or headers.get('RateLimit-Reset')
+    retry_after = headers.get('Retry-After')
+    try:
+        remaining = int(remaining) if remaining is not None else None
+        reset = float(reset) if reset is not None else None
+    except ValueError:
+        remaining = reset = None
+    # X-RateLimit-Reset is usually an epoch timestamp, RateLimit-Reset a delay
+    if reset is not None and reset > 1e9:
+        reset = max(reset - time.time(), 0)
+    if retry_after:
+        seconds = _retry_after_seconds(retry_after)
+        if seconds is not None:
+            remaining, reset = 0, seconds
+    return remaining, reset
+
+
+class _TokenBucket():
+    '''Paces the requests to one host: one request per interval, held back when the host reports its quota is used up.
+    '''
+
+    __slots__ = ('next_time', 'lock')
+
+    def __init__(self):
+        # Monotonic time at which the next request may start
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def _reserve(self, interval):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + interval
+            return start - now
+
+    def acquire(self, interval):
+        '''
+        Block until this host may be requested again
+        '''
+        time.sleep(self._reserve(interval))
+
+    async def acquire_async(self, interval):
+        '''
+        Wait without blocking the event loop until this host may be requested again
+        '''
+        await asyncio.sleep(self._reserve(interval))
+
+    def update(self, remaining=None, reset=None):
+        '''
+        Apply the quota a response reported: spread the remaining requests over the reset window, or wait it out when none are left
+        '''
+        if reset is None:
+            return
+        wait = reset if not remaining or remaining <= 0 else reset / remaining
+        with self.lock:
+            self.next_time = max(self.next_time, time.monotonic() + wait)
+
+
+# host -> (getaddrinfo results, expiry) shared by every session's connections; see _resolve_host
+_DNS_CACHE = {}
+_DNS_TTL = 300
+
+
+def _resolve_host(host, port):
+    '''
+    Resolve host to its stream addresses in getaddrinfo order, reusing the answer for _DNS_TTL seconds
+    '''
+    entry = _DNS_CACHE.get(host)
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    _DNS_CACHE[host] = (infos, time.monotonic() + _DNS_TTL)
+    return infos
+
+
+class _CachedDnsMixin():
+    '''Connects to the cached addresses of the host, trying each in turn like urllib3 does;
+       SNI and certificate checks still use the host name.
+    '''
+
+    def _new_conn(self):
+        try:
+            infos = _resolve_host(self.host, self.port)
+        except socket.gaierror:
+            # Let urllib3 resolve again and report the error in its own terms
+            return super()._new_conn()
+        # self.host reads _dns_host, so keep the name to put back once the socket is open
+        dns_host = self._dns_host
+        error = None
+        try:
+            for info in infos:
+                self._dns_host = info[4][0]
+                try:
+                    return super()._new_conn()
+                except Exception as e:
+                    error = e
+        finally:
+            self._dns_host = dns_host
+        # Every cached address failed and may be stale; look them up again next time
+        _DNS_CACHE.pop(self.host, None)
+        if error is None:
+            return super()._new_conn()
+        raise error
+
+
+class _CachedDnsHTTPConnection(_CachedDnsMixin, HTTPConnection):
+    pass
+
+
+class _CachedDnsHTTPSConnection(_CachedDnsMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDnsHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDnsHTTPConnection
+
+
+class _CachedDnsHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDnsHTTPSConnection
+
+
+def _insecure_ssl_context():
+    '''
+    SSL context that accepts any certificate, built once per extractor instead of once per connection
+    '''
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class _CachedDnsAdapter(HTTPAdapter):
+    '''HTTPAdapter whose direct connections resolve host names through the process-wide DNS cache
+       and share one SSL context.
+    '''
+
+    def __init__(self, ssl_context=None, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CachedDnsHTTPConnectionPool,
+            'https': _CachedDnsHTTPSConnectionPool,
+        }
+
+
+class _HtmlCache():
+    '''Conditional-GET cache of fetched pages in a sqlite file, plus a short-lived negative cache of failed URLs.
+    '''
+
+    def __init__(self, path, negative_ttl=300):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Shared by the session's worker threads, so every statement runs under one lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, final_url TEXT, etag TEXT, "
+            "last_modified TEXT, text TEXT, ok INTEGER, fetched_at REAL)")
+        self.lock = threading.Lock()
+        self.negative_ttl = negative_ttl
+
+    def get(self, url):
+        '''
+        Return the cached entry for url as a dictionary, or None; expired failures count as missing
+        '''
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT final_url, etag, last_modified, text, ok, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        final_url, etag, last_modified, text, ok, fetched_at = row
+        if not ok and time.time() - fetched_at > self.negative_ttl:
+            return None
+        return {'url': final_url, 'etag': etag, 'last_modified': last_modified, 'text': text, 'ok': bool(ok)}
+
+    def put(self, url, final_url, text, etag=None, last_modified=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, 1, ?)",
+                (url, final_url, etag, last_modified, text, time.time()))
+
+    def put_failure(self, url):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, NULL, NULL, NULL, NULL, 0, ?)", (url, time.time()))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
 
 class WebHtmlExtractor():
     '''Extract web HTML data, with requests and selenium methods;
        selenium requires Chrome browser and chromedriver installed and configured.
     '''
 
-    def __init__(self, header=None, data={}, time_sleep=1, time_out=20, max_retry_times=3):
+    # Fixed attribute set: cheaper attribute access and smaller instances when many extractors are pooled
+    __slots__ = ('max_retry_times', 'backoff_base', 'backoff_max', '_ua', '_ua_pool', 'header', 'data', 'time_sleep',
+                 'time_out', 'visited_urls', 'min_text_chars', 'max_bytes', 'session', '_cache', '_host_buckets',
+                 'workers', 'max_per_host', '_host_semaphores', '_jsonl_fp', '_jsonl_path', '_jsonl_count',
+                 '_driver', '_driver_headless')
+
+    # hrefs that never lead to another page
+    _SKIP_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:', 'data:')
+
+    def __init__(self, header=None, data={}, time_sleep=1, time_out=20, max_retry_times=3, max_bytes=25 * 1024 * 1024, cache_path=None, backoff_base=1.0, backoff_max=60.0, workers=8, max_per_host=8, min_text_chars=200):
         # Maximum retry count
         self.max_retry_times = max_retry_times
+        # Exponential backoff between retries: backoff_base * 2**attempt seconds, capped at backoff_max
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # fake_useragent loads its data once; requests draw from a pre-sampled pool of User-Agent strings
+        self._ua = UserAgent()
+        self._ua_pool = [self._ua.random for _ in range(64)]
         # Custom headers for requests
         if header:
             self.header = header
         else:
             # Random User-Agent for each request to avoid blocking
             self.header = {
-                'User-Agent': UserAgent().random,
+                'User-Agent': self._random_user_agent(),
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.5',
+                # gzip/deflate, plus br/zstd when a decoder is installed; bodies are decoded while streaming
+                'Accept-Encoding': ACCEPT_ENCODING,
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
                 'Cache-Control': 'max-age=0',
@@ -48,6 +331,53 @@ class WebHtmlExtractor():
         self.time_out = time_out
         # Track visited URLs to avoid duplicates
         self.visited_urls = set()
+        # Selenium requests first try a plain GET and keep it when the page has at least this much text; None always renders
+        self.min_text_chars = min_text_chars
+        # Response bodies are read in chunks and cut off after this many bytes; cut-off pages carry 'truncated': True
+        self.max_bytes = max_bytes
+        # Pooled session: keep-alive connections are reused across requests to the same host
+        self.session = requests.Session()
+        adapter = _CachedDnsAdapter(ssl_context=_insecure_ssl_context(), pool_connections=32, pool_maxsize=64, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.header)
+        # Optional on-disk cache: GETs are revalidated with ETag/Last-Modified and recent failures are not retried
+        self._cache = _HtmlCache(cache_path) if cache_path else None
+        # Per-host pacing replaces a global sleep, so requests to different hosts do not wait on each other
+        self._host_buckets = {}
+        # Threads used by the synchronous crawl, and how many of them may talk to one host at a time
+        self.workers = workers
+        self.max_per_host = max_per_host
+        self._host_semaphores = {}
+        # Crawl output goes through one buffered binary file, opened by the first crawl and kept until close()
+        self._jsonl_fp = None
+        self._jsonl_path = None
+        self._jsonl_count = 0
+        # Chrome is started on the first Selenium request and reused until close()
+        self._driver = None
+        self._driver_headless = None
+
+    def _random_user_agent(self):
+        '''
+        Pick a User-Agent from the pre-sampled pool
+        '''
+        return random.choice(self._ua_pool)
+
+    def close(self):
+        '''
+        Close the pooled session and its connections, the crawl output file, the page cache if one is open, and the Selenium driver
+        '''
+        self.session.close()
+        self._close_jsonl()
+        if self._cache:
+            self._cache.close()
+        self._quit_driver()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def save_url_html(self, base_url=None, reptile_lib="requests", method="get", time_sleep=None, time_out=None, html_dir=None, mode="w"):
         '''
@@ -77,8 +407,19 @@ class WebHtmlExtractor():
 
     def save_1_jump_url_in_base(self, base_url=None, target_url_prefix=None, reptile_lib="requests", method="get", time_sleep=None, time_out=None, html_dir=None, mode="w"):
         '''
-        Crawl base_url and all 1st-degree links
+        Crawl base_url and all 1st-degree links concurrently: with aiohttp when it is installed and no event loop is
+        running in this thread, otherwise with a thread pool over the pooled session (Selenium pages are fetched one
+        at a time, as they share one browser)
         '''
+        if reptile_lib == "requests" and aiohttp is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop running in this thread (not Jupyter or an async app) - safe to start one
+                return asyncio.run(self.save_1_jump_url_in_base_async(
+                    base_url=base_url, target_url_prefix=target_url_prefix, method=method,
+                    time_sleep=time_sleep, time_out=time_out, html_dir=html_dir, mode=mode))
+        
         if time_out is None:
             time_out = self.time_out
         if time_sleep is None:
@@ -87,7 +428,8 @@ class WebHtmlExtractor():
         # Create save directory
         os.makedirs(os.path.dirname(html_dir), exist_ok=True)
         
-        # Get base URL HTML
+        # Get base URL HTML; the base page is fetched again even if visited before, so its links can be followed
+        self.visited_urls.discard(base_url)
         html_dict = self.get_html_dict(
             url=base_url, reptile_lib=reptile_lib, method=method, time_sleep=time_sleep, time_out=time_out)
         
@@ -95,37 +437,214 @@ class WebHtmlExtractor():
         if target_url_prefix is None:
             target_url_prefix = html_dict.get('url', base_url)
         
-        # Extract links from the page
-        sub_url_list = self.get_link_sub_url_list(html_dict=html_dict, target_url_prefix=target_url_prefix)
+        # Save base URL HTML
+        self._open_jsonl(html_dir, mode)
+        self._write_jsonl(html_dict)
+        
+        fetch = partial(self._get_html_dict_per_host, reptile_lib=reptile_lib, method=method, time_sleep=time_sleep, time_out=time_out)
+        workers = self.workers if reptile_lib == "requests" else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Skip the first URL (base_url)
+            sub_url_nums = 1
+            futures = []
+            submit = executor.submit
+            for sub_url in self.get_link_sub_url_list(html_dict=html_dict, target_url_prefix=target_url_prefix)[1:]:
+                sub_url_nums += 1
+                logging.info(f"Processing URL {sub_url_nums}: {sub_url}")
+                futures.append((sub_url, submit(fetch, sub_url)))
+            
+            # Save HTML data from this thread only, in link order
+            write = self._write_jsonl
+            for sub_url, future in futures:
+                sub_html_dict = future.result()
+                if sub_html_dict and sub_html_dict.get('status'):
+                    write(sub_html_dict)
+                    logging.info(f"Saved HTML for {sub_url}")
+                else:
+                    logging.warning(f"Failed to retrieve HTML from {sub_url}")
+        self._jsonl_fp.flush()
         
         # Log info
-        sub_url_nums = len(sub_url_list)
         logging.info(f"Base URL {base_url} contains {sub_url_nums} URLs")
+
+    async def save_1_jump_url_in_base_async(self, base_url=None, target_url_prefix=None, method="get", time_sleep=None, time_out=None, html_dir=None, mode="w", concurrency=32):
+        '''
+        Crawl base_url and all 1st-degree links concurrently with aiohttp, at most concurrency requests in flight
+        '''
+        if time_out is None:
+            time_out = self.time_out
+        if time_sleep is None:
+            time_sleep = self.time_sleep
         
-        # Save base URL HTML
-        self.save_jsonl(file_path=html_dir, json_list=[html_dict], mode=mode)
+        # Create save directory
+        os.makedirs(os.path.dirname(html_dir), exist_ok=True)
         
-        # Process each URL from the list
-        for k, sub_url in enumerate(sub_url_list):
-            if k == 0:
-                continue  # Skip the first URL (base_url)
-                
-            logging.info(f"Processing URL {k+1}/{sub_url_nums} ({round((k+1)/sub_url_nums*100, 1)}%): {sub_url}")
+        # aiohttp rejects None header values, so drop them from the defaults
+        headers = {key: value for key, value in self.header.items() if value is not None}
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ssl=_insecure_ssl_context(), use_dns_cache=True, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=time_out)
+        async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as session:
+            sem = asyncio.BoundedSemaphore(concurrency)
+            
+            # Get base URL HTML
+            html_dict = await self._afetch(session, base_url, sem, method=method, time_sleep=time_sleep)
+            self._mark_visited(base_url, html_dict)
+            
+            # Use base_url as prefix if none specified
+            if target_url_prefix is None:
+                target_url_prefix = html_dict.get('url', base_url)
+            
+            # Extract links from the page
+            sub_url_list = self.get_link_sub_url_list(html_dict=html_dict, target_url_prefix=target_url_prefix)
+            logging.info(f"Base URL {base_url} contains {len(sub_url_list)} URLs")
+            
+            # Save base URL HTML
+            self._open_jsonl(html_dir, mode)
+            self._write_jsonl(html_dict)
+            
+            # A single writer drains finished pages, so concurrent fetches never interleave JSONL lines
+            queue = asyncio.Queue()
+            writer = asyncio.create_task(self._awrite_jsonl(queue))
             
-            # Get HTML for the current URL
-            sub_html_dict = self.get_html_dict(
-                url=sub_url, reptile_lib=reptile_lib, method=method, time_sleep=time_sleep, time_out=time_out)
+            async def fetch_and_queue(sub_url):
+                sub_html_dict = await self._afetch(session, sub_url, sem, method=method, time_sleep=time_sleep)
+                self._mark_visited(sub_url, sub_html_dict)
+                if sub_html_dict.get('status'):
+                    await queue.put(sub_html_dict)
+                    logging.info(f"Saved HTML for {sub_url}")
+                else:
+                    logging.warning(f"Failed to retrieve HTML from {sub_url}")
             
-            # Save HTML data
-            if sub_html_dict and sub_html_dict.get('status'):
-                self.save_jsonl(file_path=html_dir, json_list=[sub_html_dict], mode="a")
-                logging.info(f"Saved HTML for {sub_url}")
-            else:
-                logging.warning(f"Failed to retrieve HTML from {sub_url}")
+            # Skip the first URL (base_url)
+            await asyncio.gather(*(fetch_and_queue(sub_url) for sub_url in sub_url_list[1:]))
+            await queue.put(None)
+            await writer
 
-    def get_html_dict(self, url=None, reptile_lib="requests", method="get", selenium_headless=True, time_sleep=None, time_out=None):
+    async def _afetch(self, session, url, sem, method="get", time_sleep=0):
         '''
-        Send a request to URL and return HTML as dictionary
+        Fetch one URL with aiohttp and return HTML as dictionary, with the same cache and retry backoff as get_request_html
+        '''
+        html_dict = self._empty_html_dict(url)
+        
+        # Same cache lookup as get_request_html: skip URLs that failed recently, revalidate the rest
+        cached = self._cache.get(url) if self._cache and method == "get" else None
+        if cached and not cached['ok']:
+            logging.info(f"Skipping {url}: failed recently")
+            return html_dict
+        
+        for attempt in range(self.max_retry_times + 1):
+            if attempt:
+                logging.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt}/{self.max_retry_times})")
+                await asyncio.sleep(delay)
+            
+            retry_after = None
+            # Wait for this host's turn before taking a connection slot
+            bucket = self._host_bucket(url)
+            await bucket.acquire_async(time_sleep)
+            async with sem:
+                headers = {'User-Agent': self._random_user_agent()}
+                if cached:
+                    if cached['etag']:
+                        headers['If-None-Match'] = cached['etag']
+                    if cached['last_modified']:
+                        headers['If-Modified-Since'] = cached['last_modified']
+                try:
+                    if method == "get":
+                        request = session.get(url, headers=headers)
+                    else:
+                        request = session.post(url, headers=headers, data=self.data)
+                    async with request as response:
+                        bucket.update(*_rate_limit(response.headers))
+                        if response.status == 200:
+                            chunks = []
+                            total = 0
+                            truncated = False
+                            async for chunk in response.content.iter_chunked(32768):
+                                chunks.append(chunk)
+                                total += len(chunk)
+                                if total > self.max_bytes:
+                                    logging.warning(f"Response from {url} exceeds {self.max_bytes} bytes, truncating")
+                                    truncated = True
+                                    break
+                            html_dict['url'] = str(response.url)
+                            html_dict['host_url'] = self.split_host_url(html_dict['url'])
+                            html_dict['text'] = self._decode_body(b"".join(chunks)[:self.max_bytes], response.charset)
+                            html_dict['status'] = True
+                            if truncated:
+                                html_dict['truncated'] = True
+                            # A cut-off body is not cached, or a later 304 would serve it as the whole page
+                            elif self._cache and method == "get":
+                                self._cache.put(url, html_dict['url'], html_dict['text'],
+                                                response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                            logging.info(f"Request to {url} returned successfully")
+                            return html_dict
+                        if response.status == 304 and cached:
+                            # Not modified: serve the cached body
+                            html_dict['url'] = cached['url']
+                            html_dict['host_url'] = self.split_host_url(cached['url'])
+                            html_dict['text'] = cached['text']
+                            html_dict['status'] = True
+                            logging.info(f"Request to {url} not modified, using cached copy")
+                            return html_dict
+                        logging.warning(f"Request to {url} returned status code {response.status}")
+                        if response.status not in _RETRY_STATUS:
+                            break
+                        retry_after = response.headers.get('Retry-After')
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.warning(f"Request to {url} failed: {str(e)}")
+            
+            delay = self._backoff_delay(attempt, retry_after)
+        
+        logging.warning(f"Failed to retrieve {url}")
+        if self._cache and method == "get":
+            self._cache.put_failure(url)
+        return html_dict
+
+    async def _awrite_jsonl(self, queue):
+        '''
+        Write dictionaries from queue to the open crawl output until a None sentinel arrives,
+        flushing at least once a second
+        '''
+        last_flush = time.monotonic()
+        while True:
+            html_dict = await queue.get()
+            if html_dict is None:
+                break
+            self._write_jsonl(html_dict)
+            if time.monotonic() - last_flush >= 1.0:
+                self._jsonl_fp.flush()
+                last_flush = time.monotonic()
+        self._jsonl_fp.flush()
+
+    def _open_jsonl(self, file_path, mode="w"):
+        '''
+        Point the crawl output at file_path; append mode keeps the already open file for the same path
+        '''
+        if mode.startswith("a") and self._jsonl_fp is not None and self._jsonl_path == file_path:
+            return
+        self._close_jsonl()
+        self._jsonl_fp = open(file_path, mode[0] + "b", buffering=1 << 20)
+        self._jsonl_path = file_path
+        self._jsonl_count = 0
+
+    def _write_jsonl(self, json_dict, flush_every=100):
+        '''
+        Append one dictionary to the crawl output as a JSON line, flushing every flush_every records
+        '''
+        self._jsonl_fp.write(_json_dumps_line(json_dict))
+        self._jsonl_count += 1
+        if self._jsonl_count % flush_every == 0:
+            self._jsonl_fp.flush()
+
+    def _close_jsonl(self):
+        if self._jsonl_fp is not None:
+            self._jsonl_fp.close()
+            self._jsonl_fp = None
+            self._jsonl_path = None
+
+    def get_html_dict(self, url=None, reptile_lib="requests", method="get", selenium_headless=True, time_sleep=None, time_out=None, wait_selector=None):
+        '''
+        Send a request to URL and return HTML as dictionary; wait_selector is passed on to get_selenium_html
         '''
         assert reptile_lib in ("requests", "selenium"), "reptile_lib must be 'requests' or 'selenium'"
         
@@ -134,16 +653,74 @@ class WebHtmlExtractor():
         if time_sleep is None:
             time_sleep = self.time_sleep
         
+        # Pages already fetched by this extractor are not requested again
+        if url in self.visited_urls:
+            logging.info(f"Skipping {url}: already visited")
+            return self._empty_html_dict(url)
+        
         # Use the appropriate method to retrieve HTML
         if reptile_lib == "requests":
             html_dict = self.get_request_html(
                 url=url, method=method, time_sleep=time_sleep, time_out=time_out)
         elif reptile_lib == "selenium":
+            # Static pages do not need a browser: keep a plain GET when it already carries the content
+            if self.min_text_chars is not None:
+                html_dict = self.get_request_html(
+                    url=url, time_sleep=time_sleep, time_out=time_out, retry_times=self.max_retry_times + 1)
+                if html_dict['status'] and not self._needs_browser(html_dict['text']):
+                    logging.info(f"Static HTML of {url} is sufficient, skipping Selenium")
+                    self._mark_visited(url, html_dict)
+                    return html_dict
             html_dict = self.get_selenium_html(
-                url=url, method=method, time_sleep=time_sleep, time_out=time_out, headless=selenium_headless)
+                url=url, method=method, time_sleep=time_sleep, time_out=time_out, headless=selenium_headless, wait_selector=wait_selector)
         
+        self._mark_visited(url, html_dict)
         return html_dict
 
+    def _empty_html_dict(self, url):
+        '''
+        HTML dictionary of a page that has not been retrieved
+        '''
+        return {
+            'url': url,
+            'host_url': self.split_host_url(url),
+            'text': None,
+            'status': False
+        }
+
+    def _mark_visited(self, url, html_dict):
+        '''
+        Record a successfully fetched page under both the requested URL and the final URL after redirects
+        '''
+        if html_dict.get('status'):
+            self.visited_urls.add(url)
+            self.visited_urls.add(html_dict['url'])
+
+    def _needs_browser(self, html_content):
+        '''
+        Whether static HTML looks client-side rendered: an SPA marker, or less than min_text_chars of visible text
+        '''
+        if not html_content or any(marker in html_content for marker in _SPA_MARKERS):
+            return True
+        try:
+            soup = BeautifulSoup(html_content, 'lxml')
+        except FeatureNotFound:
+            soup = BeautifulSoup(html_content, 'html.parser')
+        for tag in soup(['script', 'style', 'noscript', 'template']):
+            tag.decompose()
+        return len(soup.get_text(strip=True)) < self.min_text_chars
+
+    def _get_html_dict_per_host(self, url, **kwargs):
+        '''
+        get_html_dict for pool threads, with at most max_per_host requests to the host of url at once
+        '''
+        host_url = self.split_host_url(url)
+        semaphore = self._host_semaphores.get(host_url)
+        if semaphore is None:
+            semaphore = self._host_semaphores.setdefault(host_url, threading.BoundedSemaphore(self.max_per_host))
+        with semaphore:
+            return self.get_html_dict(url=url, **kwargs)
+
     def get_request_html(self, url=None, method="get", time_sleep=None, retry_times=1, header=None, data=None, time_out=None):
         '''
         Send requests to URL and return HTML as dictionary
@@ -153,9 +730,10 @@ class WebHtmlExtractor():
         # Use custom header if provided
         if header:
             self.header = header
+            request_header = header
         else:
-            # Add a random User-Agent to avoid being blocked
-            self.header['User-Agent'] = UserAgent().random
+            # Add a random User-Agent to avoid being blocked; passed per request so the shared session is left untouched
+            request_header = {'User-Agent': self._random_user_agent()}
             
         if data:
             self.data = data
@@ -164,54 +742,133 @@ class WebHtmlExtractor():
         if time_sleep is None:
             time_sleep = self.time_sleep
         
-        # Delay before request to avoid rate limiting
-        time.sleep(time_sleep)
-        
         # Initialize HTML dictionary with default values
-        html_dict = {
-            'url': url,
-            'host_url': self.split_host_url(url),
-            'text': None,
-            'status': False
-        }
+        html_dict = self._empty_html_dict(url)
         
-        # Try to send the request
-        try:
-            if method == "get":
-                response = requests.get(url, headers=self.header, timeout=time_out, verify=False)
-            elif method == "post":
-                response = requests.post(url, headers=self.header, data=self.data, timeout=time_out, verify=False)
+        # Look the URL up in the cache: skip URLs that failed recently, revalidate the rest
+        cached = self._cache.get(url) if self._cache and method == "get" else None
+        if cached and not cached['ok']:
+            logging.info(f"Skipping {url}: failed recently")
+            return html_dict
+        if cached:
+            request_header = dict(request_header)
+            if cached['etag']:
+                request_header['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                request_header['If-Modified-Since'] = cached['last_modified']
+        
+        bucket = self._host_bucket(url)
+        for attempt in range(retry_times - 1, self.max_retry_times + 1):
+            if attempt >= retry_times:
+                logging.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt}/{self.max_retry_times})")
+                time.sleep(delay)
             
-            # Check if the response was successful
-            if response.status_code == 200:
-                # Update HTML dictionary with response data
-                html_dict['url'] = response.url
-                html_dict['host_url'] = self.split_host_url(response.url)
-                html_dict['text'] = response.text
-                html_dict['status'] = True
-                logging.info(f"Request to {url} returned successfully")
-                return html_dict
-            else:
-                # Handle non-200 response
-                logging.warning(f"Request to {url} returned status code {response.status_code}")
+            # Wait for this host's turn to avoid rate limiting
+            bucket.acquire(time_sleep)
+            
+            retry_after = None
+            # Try to send the request
+            try:
+                if method == "get":
+                    response = self.session.get(url, headers=request_header, timeout=time_out, verify=False, stream=True)
+                elif method == "post":
+                    response = self.session.post(url, headers=request_header, data=self.data, timeout=time_out, verify=False, stream=True)
+                bucket.update(*_rate_limit(response.headers))
                 
-        except (Timeout, RequestException) as e:
-            # Handle timeouts and other request exceptions
-            logging.warning(f"Request to {url} failed: {str(e)}")
-        
-        # Retry if we haven't reached the maximum retry count
-        if retry_times <= self.max_retry_times:
-            logging.warning(f"Retrying {url} (attempt {retry_times}/{self.max_retry_times})")
-            # Increase delay for retries to avoid rate limiting
-            return self.get_request_html(
-                url=url, method=method, time_sleep=time_sleep*1.5, retry_times=retry_times+1)
-        else:
-            logging.warning(f"Failed to retrieve {url} after {self.max_retry_times} attempts")
-            return html_dict
+                # Check if the response was successful
+                if response.status_code == 200:
+                    logging.debug(f"Response from {url} has Content-Encoding {response.headers.get('Content-Encoding')}")
+                    # Read the body in bounded chunks instead of materializing it through response.text
+                    chunks = []
+                    total = 0
+                    truncated = False
+                    with response:
+                        for chunk in response.iter_content(chunk_size=32768):
+                            chunks.append(chunk)
+                            total += len(chunk)
+                            if total > self.max_bytes:
+                                logging.warning(f"Response from {url} exceeds {self.max_bytes} bytes, truncating")
+                                truncated = True
+                                break
+                    
+                    # Update HTML dictionary with response data
+                    html_dict['url'] = response.url
+                    html_dict['host_url'] = self.split_host_url(response.url)
+                    html_dict['text'] = self._decode_body(b"".join(chunks)[:self.max_bytes], response.encoding)
+                    html_dict['status'] = True
+                    if truncated:
+                        html_dict['truncated'] = True
+                    # A cut-off body is not cached, or a later 304 would serve it as the whole page
+                    elif self._cache and method == "get":
+                        self._cache.put(url, html_dict['url'], html_dict['text'],
+                                        response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    logging.info(f"Request to {url} returned successfully")
+                    return html_dict
+                elif response.status_code == 304 and cached:
+                    # Not modified: serve the cached body
+                    response.close()
+                    html_dict['url'] = cached['url']
+                    html_dict['host_url'] = self.split_host_url(cached['url'])
+                    html_dict['text'] = cached['text']
+                    html_dict['status'] = True
+                    logging.info(f"Request to {url} not modified, using cached copy")
+                    return html_dict
+                else:
+                    # Handle non-200 response
+                    response.close()
+                    logging.warning(f"Request to {url} returned status code {response.status_code}")
+                    if response.status_code not in _RETRY_STATUS:
+                        break
+                    retry_after = response.headers.get('Retry-After')
+                    
+            except (Timeout, RequestException) as e:
+                # Handle timeouts and other request exceptions
+                logging.warning(f"Request to {url} failed: {str(e)}")
+            
+            delay = self._backoff_delay(attempt, retry_after)
+        
+        logging.warning(f"Failed to retrieve {url}")
+        if self._cache and method == "get":
+            self._cache.put_failure(url)
+        return html_dict
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        '''
+        Seconds to wait before the next attempt: exponential backoff with jitter, or the server's Retry-After
+        '''
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) + random.uniform(0, 0.5)
+        if retry_after:
+            seconds = _retry_after_seconds(retry_after)
+            if seconds is not None:
+                delay = min(seconds, self.backoff_max)
+        return delay
+
+    def _host_bucket(self, url):
+        '''
+        Return the token bucket that paces requests to the host of url
+        '''
+        host_url = self.split_host_url(url)
+        bucket = self._host_buckets.get(host_url)
+        if bucket is None:
+            bucket = self._host_buckets.setdefault(host_url, _TokenBucket())
+        return bucket
 
-    def get_selenium_html(self, url=None, method="get", time_sleep=None, retry_times=1, headless=True, time_out=None):
+    def _decode_body(self, body, encoding):
         '''
-        Use Selenium to render page and return HTML as dictionary
+        Decode a response body once; without a charset the encoding is detected from the body, as requests'
+        response.text does (apparent_encoding), and utf-8 is used for an unknown one
+        '''
+        if not encoding and body:
+            encoding = chardet.detect(body)['encoding']
+        try:
+            return body.decode(encoding or "utf-8", errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
+    def get_selenium_html(self, url=None, method="get", time_sleep=None, retry_times=1, headless=True, time_out=None, wait_selector=None):
+        '''
+        Use Selenium to render page and return HTML as dictionary;
+        for single-page apps, wait_selector is a CSS selector that only matches once the content has been rendered
         '''
         assert method == "get", "Selenium only supports GET method"
         
@@ -221,76 +878,99 @@ class WebHtmlExtractor():
             time_sleep = self.time_sleep
             
         # Initialize HTML dictionary
-        html_dict = {
-            'url': url,
-            'host_url': self.split_host_url(url),
-            'text': None,
-            'status': False
-        }
+        html_dict = self._empty_html_dict(url)
             
+        for attempt in range(retry_times - 1, self.max_retry_times + 1):
+            if attempt >= retry_times:
+                delay = self._backoff_delay(attempt - 1)
+                logging.warning(f"Retrying {url} with Selenium in {delay:.1f}s (attempt {attempt}/{self.max_retry_times})")
+                time.sleep(delay)
+            
+            try:
+                # Reuse the running Chrome; only the first request (or one after a failure) pays for startup
+                driver = self._get_driver(headless)
+                
+                # Isolate pages from each other and rotate the User-Agent without restarting the browser
+                driver.delete_all_cookies()
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': self._random_user_agent()})
+                
+                # Wait for this host's turn
+                self._host_bucket(url).acquire(time_sleep)
+                
+                # Load the URL
+                driver.get(url)
+                
+                # Wait until the page and every resource it requested have finished loading
+                wait = WebDriverWait(driver, time_out)
+                wait.until(lambda d: d.execute_script(
+                    "return document.readyState === 'complete' && "
+                    "performance.getEntriesByType('resource').every(r => r.responseEnd > 0)"))
+                if wait_selector:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector)))
+                
+                # Get page content
+                page_source = driver.page_source
+                current_url = driver.current_url
+                
+                # Update HTML dictionary
+                html_dict['url'] = current_url
+                html_dict['host_url'] = self.split_host_url(current_url)
+                html_dict['text'] = page_source
+                html_dict['status'] = True
+                
+                logging.info(f"Selenium successfully retrieved {url}")
+                return html_dict
+                
+            except (WebDriverException, TimeoutException) as e:
+                logging.warning(f"Selenium error for {url}: {str(e)}")
+                
+                # Start from a fresh browser on the next attempt
+                self._quit_driver()
+        
+        logging.warning(f"Failed to retrieve {url} with Selenium after {self.max_retry_times} retries")
+        return html_dict
+
+    def _get_driver(self, headless=True):
+        '''
+        Return the shared Chrome driver, starting one when none is running or the headless mode changed
+        '''
+        if self._driver is not None and self._driver_headless == headless:
+            return self._driver
+        self._quit_driver()
+        
         # Configure Chrome options
         options = Options()
         options.headless = headless
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
-        options.add_argument(f"user-agent={UserAgent().random}")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument(f"user-agent={self._random_user_agent()}")
         
-        driver = None
-        try:
-            # Initialize Chrome driver
-            driver = webdriver.Chrome(options=options)
-            
-            # Add a delay
-            time.sleep(time_sleep)
-            
-            # Load the URL
-            driver.get(url)
-            
-            # Wait for page to load
-            wait = WebDriverWait(driver, time_out)
-            wait.until(EC.visibility_of_any_elements_located((By.TAG_NAME, "body")))
-            
-            # Additional wait for dynamic content
-            time.sleep(time_sleep)
-            
-            # Get page content
-            page_source = driver.page_source
-            current_url = driver.current_url
-            
-            # Update HTML dictionary
-            html_dict['url'] = current_url
-            html_dict['host_url'] = self.split_host_url(current_url)
-            html_dict['text'] = page_source
-            html_dict['status'] = True
-            
-            logging.info(f"Selenium successfully retrieved {url}")
-            
-        except (WebDriverException, TimeoutException) as e:
-            logging.warning(f"Selenium error for {url}: {str(e)}")
-            
-            # Retry if we haven't reached the maximum retry count
-            if retry_times <= self.max_retry_times:
-                logging.warning(f"Retrying {url} with Selenium (attempt {retry_times}/{self.max_retry_times})")
-                # Clean up before retry
-                if driver:
-                    driver.quit()
-                # Increase delay for retries
-                return self.get_selenium_html(
-                    url=url, time_sleep=time_sleep*1.5, retry_times=retry_times+1, headless=headless)
-            else:
-                logging.warning(f"Failed to retrieve {url} with Selenium after {self.max_retry_times} attempts")
-                
-        finally:
-            # Always clean up the driver
-            if driver:
-                driver.quit()
-                
-        return html_dict
+        # Initialize Chrome driver
+        self._driver = webdriver.Chrome(options=options)
+        
+        # Skip images, stylesheets, fonts and media
+        self._driver.execute_cdp_cmd('Network.enable', {})
+        self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': _BLOCKED_URLS})
+        self._driver_headless = headless
+        return self._driver
+
+    def _quit_driver(self):
+        '''
+        Quit the shared Chrome driver if one is running
+        '''
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except WebDriverException as e:
+                logging.warning(f"Error quitting Selenium driver: {str(e)}")
+            self._driver = None
+            self._driver_headless = None
 
     def get_link_sub_url_list(self, html_dict={}, target_url_prefix=None):
         '''
-        Extract all links from HTML that match the target prefix
+        Extract all links from HTML that match the target prefix and have not been visited yet
         '''
         # Get HTML content and URL
         html_content = html_dict.get('text')
@@ -300,8 +980,11 @@ class WebHtmlExtractor():
         if not html_content:
             return [url] if url else []
         
-        # Create BeautifulSoup object
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Build only the <a href> elements, with the C-backed lxml builder when it is installed
+        try:
+            soup = BeautifulSoup(html_content, 'lxml', parse_only=_LINK_STRAINER)
+        except FeatureNotFound:
+            soup = BeautifulSoup(html_content, 'html.parser', parse_only=_LINK_STRAINER)
         
         # Find all links
         links = soup.find_all('a')
@@ -316,34 +999,49 @@ class WebHtmlExtractor():
         # Extract the host URL for relative links
         host_url = self.split_host_url(url) if url else ""
         
-        # Process all links
+        # Process all links, dropping duplicates while preserving order; lookups are bound outside the loop
+        seen = set(sub_url_list)
+        resolve = self._resolve_sub_url
+        visited = self.visited_urls
+        append = sub_url_list.append
         for link in links:
             href = link.get('href')
             if href:
-                # Skip anchors, javascript, and mailto links
-                if href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
-                    continue
-                    
-                # Convert relative URLs to absolute
-                absolute_url = urljoin(host_url, href)
-                
-                # Only include URLs that match the prefix
-                if absolute_url.startswith(target_url_prefix):
-                    # Remove fragments
-                    clean_url = absolute_url.split('#')[0]
-                    sub_url_list.append(clean_url)
+                clean_url = resolve(href, host_url, target_url_prefix)
+                if clean_url and clean_url not in seen:
+                    seen.add(clean_url)
+                    if clean_url not in visited:
+                        append(clean_url)
+        
+        return sub_url_list
+
+    def _resolve_sub_url(self, href, host_url, target_url_prefix):
+        '''
+        Turn an href into an absolute URL without fragment, or None when it should not be followed
+        '''
+        # Skip anchors, javascript, mailto, tel and data links
+        if href.startswith(self._SKIP_PREFIXES):
+            return None
+            
+        # Convert relative URLs to absolute; absolute links are taken as they are, skipping the costly urljoin
+        if href.startswith(('http://', 'https://')):
+            absolute_url = href
+        else:
+            absolute_url = urljoin(host_url, href)
         
-        # Remove duplicates while preserving order
-        return list(dict.fromkeys(sub_url_list))
+        # Only include URLs that match the prefix
+        if absolute_url.startswith(target_url_prefix):
+            # Remove fragments
+            return absolute_url.partition('#')[0]
+        return None
 
     def save_jsonl(self, json_list=[], file_path=None, mode="w"):
         '''
         Save JSON list to JSONL file
         '''
         try:
-            with open(file_path, mode, encoding="utf-8") as f:
-                for line in json_list:
-                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            with open(file_path, mode[0] + "b") as f:
+                f.writelines(_json_dumps_line(line) for line in json_list)
         except Exception as e:
             logging.error(f"Error saving to {file_path}: {str(e)}")
 
@@ -355,9 +1053,7 @@ class WebHtmlExtractor():
             return ""
             
         try:
-            parsed_url = urlsplit(url)
-            host_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            return host_url
+            return _split_host_url_cached(url)
         except Exception as e:
             logging.warning(f"Error parsing URL {url}: {str(e)}")
             return ""
\ No newline at end of file
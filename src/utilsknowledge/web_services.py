@@ -1,9 +1,106 @@
 import os
 import shutil
 import logging
+import re
+import asyncio
+import bisect
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# kludge - starts of strings that are most likely inline javascript, not page text;
+# a tuple, so one str.startswith call tests all of them
+JS_MARKERS = (
+    "{",
+    "function",
+    "(function",
+    "if (",
+    "window",
+    "on",
+    "#",
+    "this.",
+    ".",
+    "var",
+    ";",
+    "html",
+    "@",
+)
+
+# file links that link_handler skips in crawling, by extension
+_LINK_EXT_TYPES = {
+    "js": "js",
+    "ico": "other_formatting",
+    "ttf": "other_formatting",
+    "css": "css",
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _classify_href(href, url_base):
+    """Classifies a link as (js_skip, link_out, link_type) - cached, since nav menus,
+    footers and sidebars repeat the same href many times on a page."""
+
+    link_out = ""
+    link_type = ""
+    js_skip = 0
+
+    # .js, .ico, .ttf and .css files - one dict lookup on the extension
+    _, dot, ext = href.rpartition(".")
+    ext = ext.lower()
+    if dot and ext in _LINK_EXT_TYPES:
+        link_out = href
+        link_type = _LINK_EXT_TYPES[ext]
+        js_skip = 1
+
+    in_base = href.startswith(url_base)
+
+    if in_base:
+        # save relative link only
+        link_out = href[len(url_base) :]
+        link_type = "internal"
+
+    if href.startswith("/") and not href.startswith("//"):
+        # relative link
+        link_out = href
+        link_type = "internal"
+
+    if href.startswith("https://") and not in_base:
+        # website but not the url_base - external link
+        link_out = href
+        link_type = "external"
+
+    return js_skip, link_out, link_type
+
+
+# image file extensions that are saved, and the type used in the saved file name
+_IMG_TYPES = {"png": "png", "jpg": "jpg", "jpeg": "jpg", "tiff": "tiff", "svg": "svg"}
+
+# the attributes website_main_processor branches on - one set intersection per element
+# picks the branches to enter
+_INTERESTING_KEYS = frozenset(
+    ("property", "src", "href", "type", "charset", "jsname", "jscontroller")
+)
+
+# BeautifulSoup types every string by its innermost enclosing tag of these (its
+# DEFAULT_STRING_CONTAINERS), and an element's text is only the strings of its own kind -
+# so e.g. script / style / rt text stays out of the text of the elements around it
+_STRING_CONTAINERS = frozenset(("script", "style", "template", "rt", "rp"))
+
+# starts of strings that end an element's text - high probability inline js
+_JS_BREAKS = ("(function", "window.", "this.")
+
+# lexbor keeps <template> content out of the document tree, while BeautifulSoup + lxml parse it
+# as ordinary elements - pages with templates take the BeautifulSoup path
+_TEMPLATE_TAG = re.compile(r"<template[\s/>]", re.IGNORECASE)
+_TEMPLATE_TAG_BYTES = re.compile(rb"<template[\s/>]", re.IGNORECASE)
+
 
 class WebSiteParser:
     def __init__(
@@ -16,10 +113,12 @@ class WebSiteParser:
         from_file=False,
         text_only=False,
         unverified_context=False,
+        page=None,
     ):
         try:
             from bs4 import BeautifulSoup
-            from urllib.request import urlopen, Request
+            import requests
+            from requests.adapters import HTTPAdapter
 
         except ModuleNotFoundError or ImportError:
             raise LLMWareException(
@@ -36,6 +135,9 @@ class WebSiteParser:
         #   preferred method is to update the ssl certificate to remove this error
         self.unverified_context = unverified_context
 
+        # applied per request on this parser's session only - no process-wide ssl state is changed
+        self._verify = not unverified_context
+
         # by default, assume that url_or_fp is a url path
         self.url_main = url_or_fp
 
@@ -50,6 +152,14 @@ class WebSiteParser:
 
         self.url_base = self.url_main + self.url_link
 
+        #   one pooled session for the page and all of its images - keep-alive connections are reused
+        #   instead of paying a new TCP + TLS handshake per request
+        self._session = requests.Session()
+        self._session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
         if not os.path.exists(Config.get_path()):
             # if not explicitly set up by user, then create folder directory structure
             Config.setup_workspace()
@@ -60,6 +170,9 @@ class WebSiteParser:
         else:
             self.local_dir = local_file_path
 
+        # encoded once - image saves join bytes paths and go straight to os.open
+        self._local_dir_bytes = os.fsencode(self.local_dir)
+
         if reset_img_folder:
             if os.path.exists(self.local_dir):
                 # important step to remove & clean out any old artifacts in the /tmp/ directory
@@ -73,8 +186,7 @@ class WebSiteParser:
             # interpret url as file_path and file_name
             try:
                 html = open(url_or_fp, encoding="utf-8-sig", errors="ignore").read()
-                bs = BeautifulSoup(html, features="lxml")
-                self.html = bs.findAll()
+                self._parse(html)
                 success_code = 1
                 self.text_only = True
             except:
@@ -85,37 +197,20 @@ class WebSiteParser:
                 self.text_only = True
         else:
             # this is the most likely default case -interpret url_or_fp as url
+            # page - html of the url if already downloaded (e.g., by parse_many), skips the request
             try:
-                req = Request(
-                    self.url_base,
-                    headers={"User-Agent": "Mozilla/5.0"},
-                    unverifiable=True,
-                )
-
-                if self.unverified_context:
-                    import ssl
-
-                    ssl._create_default_https_context = ssl._create_unverified_context
-                    html = urlopen(req).read()
-                else:
-                    html = urlopen(req).read()
-
-                bs = BeautifulSoup(html, features="lxml")
+                if page is None:
+                    response = self._session.get(self.url_base, verify=self._verify)
+                    response.raise_for_status()
+                    page = response.content
 
-                self.bs = bs
-                self.html = bs.findAll()
+                html = page
+                self._parse(html)
 
-                out_str = ""
-                for x in self.html:
-                    out_str += str(x) + " "
-
-                with open(
-                    os.path.join(self.local_dir, "my_website.html"),
-                    "w",
-                    encoding="utf-8",
-                ) as f:
-                    f.write(out_str)
-                f.close()
+                # archive the response body as downloaded - no re-serializing of the parsed
+                # elements and no decode / re-encode round trip
+                with open(os.path.join(self.local_dir, "my_website.html"), "wb") as f:
+                    f.write(html)
 
                 success_code = 1
 
@@ -145,10 +240,192 @@ class WebSiteParser:
         self.external_links = []
         self.other_links = []
 
+        # image bytes downloaded ahead of the main walk - full_url -> (bytes, status_code)
+        self._prefetched_images = {}
+
         # meta-data expected in library add process
         self.source = str(self.url_base)
         self.success_code = success_code
 
+    def _parse(self, html):
+        """Parses the page - with selectolax (C parser, no per-node Python objects built up
+        front) if installed, else with BeautifulSoup + lxml."""
+
+        self._page = html
+        self._bs = None
+        self._tree = None
+
+        # element list and text index of the page - built on first use by _walk
+        self._elements = None
+        self._strings = {}
+
+        # image references and links are collected on first use by _single_pass
+        self._walked = False
+        self._image_refs = []
+        self._all_links = ([], [], [])
+
+        template = _TEMPLATE_TAG_BYTES if isinstance(html, bytes) else _TEMPLATE_TAG
+        if LexborHTMLParser is not None and not template.search(html):
+            self._tree = LexborHTMLParser(html)
+        else:
+            self._bs = self._make_soup(html)
+
+    @staticmethod
+    def _make_soup(html):
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(html, features="lxml")
+
+    @property
+    def bs(self):
+        """BeautifulSoup tree of the page - built on first access when selectolax did the parsing."""
+
+        if self._bs is None:
+            self._bs = self._make_soup(self._page)
+        return self._bs
+
+    @property
+    def html(self):
+        """All tags of the page in document order, as BeautifulSoup tags - streamed from the
+        parse tree on each walk, rather than materialized once as a second flat list next to
+        the tree.  The parser's own passes use _walk."""
+
+        from bs4 import Tag
+
+        return (el for el in self.bs.descendants if isinstance(el, Tag))
+
+    def _walk(self):
+        """One descent over the page, done once: the elements that have attributes, in document
+        order, as (position, tag name, attrs, span) - position counts every element of the page, span
+        locates the element's text in the string index (see _span_text).  Each text node is
+        visited once, instead of once for every element above it."""
+
+        if self._elements is not None:
+            return self._elements
+
+        # string kind (None for main text, else the container tag name) -> [stripped non-empty
+        # strings in document order, indexes of the strings starting with _JS_BREAKS,
+        # number of non-empty strings before stripping]
+        strings = {None: [[], [], 0]}
+        elements = []
+        position = 0
+
+        if self._tree is not None:
+            lexbor = True
+            top = [self._tree.root]
+        else:
+            from bs4 import Tag, NavigableString, CData
+            from bs4.builder import HTMLTreeBuilder
+
+            lexbor = False
+            top = self.bs.contents
+            # bs4 has already typed each string by its container
+            string_kinds = {NavigableString: None, CData: None}
+            string_kinds.update(
+                (cls, name)
+                for name, cls in HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS.items()
+            )
+
+        # open string containers - only needed for lexbor, where text nodes are untyped
+        containers = []
+        # (child iterator, (record, own string kind, index of its first string, non-empty count) of the element)
+        stack = [(iter(top), None)]
+
+        while stack:
+            children, frame = stack[-1]
+            node = next(children, None)
+
+            if node is None:
+                stack.pop()
+                if frame is not None:
+                    record, kind, start, raw_start = frame
+                    if lexbor and kind is not None:
+                        containers.pop()
+                    if record is not None:
+                        index = strings[kind]
+                        record[3] = (kind, start, len(index[0]), index[2] > raw_start)
+                continue
+
+            if lexbor:
+                if node.is_element_node:
+                    name = node.tag
+                    attrs = node.attributes
+                    if None in attrs.values():
+                        # bs4 gives valueless attributes an empty string
+                        attrs = {k: "" if v is None else v for k, v in attrs.items()}
+                    child_nodes = node.iter(include_text=True)
+                elif node.is_text_node:
+                    kind = containers[-1] if containers else None
+                    text = node.text_content
+                    name = None
+                else:
+                    continue
+            elif isinstance(node, Tag):
+                name = node.name
+                attrs = node.attrs
+                child_nodes = iter(node.contents)
+            else:
+                # comments, doctype etc. are not text
+                if type(node) not in string_kinds:
+                    continue
+                kind = string_kinds[type(node)]
+                text = node
+                name = None
+
+            if name is None:
+                if text:
+                    index = strings.get(kind)
+                    if index is None:
+                        index = strings[kind] = [[], [], 0]
+                    index[2] += 1
+                    text = text.strip()
+                    if text:
+                        if text.startswith(_JS_BREAKS):
+                            index[1].append(len(index[0]))
+                        index[0].append(text)
+                continue
+
+            position += 1
+            kind = name if name in _STRING_CONTAINERS else None
+            if lexbor and kind is not None:
+                containers.append(kind)
+            index = strings.get(kind)
+            if index is None:
+                index = strings[kind] = [[], [], 0]
+
+            record = None
+            if attrs:
+                record = [position, name, attrs, None]
+                elements.append(record)
+
+            stack.append((child_nodes, (record, kind, len(index[0]), index[2])))
+
+        self._strings = strings
+        self._elements = elements
+        return elements
+
+    def _span_text(self, span):
+        """Text of an element from the string index - its stripped strings joined, empty when the
+        first one looks like inline js, and cut at the first string that starts like inline js.
+        """
+
+        kind, start, stop, has_text = span
+        found, breaks, _ = self._strings[kind]
+
+        # kludge -  list of exclusions to remove the most common javascript in site
+        if start == stop or found[start].startswith(JS_MARKERS):
+            return ""
+
+        #   if found at start of any substring - high probability inline js -  break
+        cut = bisect.bisect_left(breaks, start)
+        if cut < len(breaks) and breaks[cut] < stop:
+            stop = breaks[cut]
+
+        # alt for consideration to clean up string
+        # s_out += string.replace('\n', ' ').replace('\r', ' ').replace('\xa0', ' ').replace('\t', ' ')
+
+        return " ".join(found[start:stop]) + " "
+
     def website_main_processor(self, img_start, output_index=True):
         """Main processing of HTML scraped content and converting into blocks."""
 
@@ -163,21 +440,36 @@ class WebSiteParser:
 
         long_running_string = ""
 
-        # new all_text to remove duplications
-        all_text = []
+        # new all_text to remove duplications - sets, as they are only used for membership checks
+        all_text = set()
 
         internal_links = []
         external_links = []
-        header_text = []
-        unique_text_list = []
-        unique_header_list = []
+
+        # headers kept per tag as found - h1s + h2s + h3s is the tag-ordered header list, no sort
+        h1s = []
+        h2s = []
+        h3s = []
+        header_lists = {"h1": h1s, "h2": h2s, "h3": h3s}
+
+        unique_text_list = set()
+        unique_header_list = set()
 
         last_text = ""
         last_header = ""
 
         text = ""
 
-        for elements in self.html:
+        # download every image on the page concurrently before the walk - the walk then
+        # only saves the bytes instead of waiting on one request after another
+        if not self.text_only:
+            self._prefetched_images = self._prefetch_images(self._collect_image_urls())
+
+        # structural elements with no attributes can never add an image, a link or text -
+        # the walk leaves them out
+        for _, name, attrs, span in self._walk():
+            keys = attrs.keys() & _INTERESTING_KEYS
+
             content_found = 0
             img = ""
             img_success = 0
@@ -193,33 +485,40 @@ class WebSiteParser:
 
             # if text only, then skip checks for images and links
             if not self.text_only:
-                if "property" in elements.attrs:
-                    if elements.attrs["property"] == "og:image":
-                        if "content" in elements.attrs:
-                            img_extension = elements["content"]
+                if "property" in keys:
+                    if attrs["property"] == "og:image":
+                        if "content" in attrs:
+                            img_extension = attrs["content"]
                             img_success, img, img_url, img_name = self.image_handler(
-                                img_extension, elements, img_counter
+                                img_extension, attrs, img_counter
                             )
 
                             if img_success == 1:
                                 img_counter += 1
                                 content_found += 1
 
-                if "src" in elements.attrs:
-                    img_extension = elements["src"]
+                if "src" in keys:
+                    img_extension = attrs["src"]
                     img_success, img, img_url, img_name = self.image_handler(
-                        img_extension, elements, img_counter
+                        img_extension, attrs, img_counter
                     )
 
                     if img_success == 1:
                         img_counter += 1
                         content_found += 1
 
-                if "href" in elements.attrs:
-                    if elements.attrs["href"]:
-                        link_success, link, link_type = self.link_handler(elements)
+                # entry type is set where the content is found - image first, then link, else text
+                if img and img_success == 1:
+                    entry_type = "image"
+
+                if "href" in keys:
+                    if attrs["href"]:
+                        link_success, link, link_type = self.link_handler(attrs)
                         content_found += 1
 
+                        if link and entry_type != "image":
+                            entry_type = "link"
+
                         if link_success == 0:
                             # skip .js files and other formatting in link crawling
                             # link_success == 0 if not .js // ==1 if .js file
@@ -232,86 +531,38 @@ class WebSiteParser:
                             if link_type == "external":
                                 external_links.append(link)
 
-            # main check for text
-            if elements.get_text():
-                get_text = 1
-
-                if elements.attrs == {}:
-                    get_text = -1
-
-                if "type" in elements.attrs:
-                    # skip css and javascript
-                    if elements.attrs["type"] in [
-                        "text/css",
-                        "text/javascript",
-                        "application/ld+json",
-                        "application/jd+json",
-                    ]:
-                        get_text = -1
-
-                #   wip - generally associated with javascript inline script
-                if "charset" in elements.attrs:
+            # main check for text - the attribute screens run first, then the element's text
+            # comes from the string index built by the single descent of _walk
+            get_text = 1
+
+            if "type" in keys:
+                # skip css and javascript
+                if attrs["type"] in [
+                    "text/css",
+                    "text/javascript",
+                    "application/ld+json",
+                    "application/jd+json",
+                ]:
                     get_text = -1
 
-                if "jsname" in elements.attrs:
-                    get_text = -1
+            #   wip - generally associated with javascript inline script
+            if "charset" in keys:
+                get_text = -1
 
-                if "jscontroller" in elements.attrs:
-                    get_text = -1
+            if "jsname" in keys:
+                get_text = -1
 
-                if get_text == 1:
-                    # text handler
-                    s_out = ""
-
-                    # alt for consideration to clean up string
-                    # s_out += string.replace('\n', ' ').replace('\r', ' ').replace('\xa0', ' ').replace('\t', ' ')
-
-                    js_markers = [
-                        "{",
-                        "function",
-                        "(function",
-                        "if (",
-                        "window",
-                        "on",
-                        "#",
-                        "this.",
-                        ".",
-                        "var",
-                        ";",
-                        "html",
-                        "@",
-                    ]
-
-                    keep_adding = True
-
-                    for string in elements.stripped_strings:
-                        if not s_out:
-                            # kludge -  list of exclusions to remove the most common javascript in site
-                            for marker in js_markers:
-                                if string.startswith(marker):
-                                    keep_adding = False
-                                    break
-
-                        #   if found at start of any substring - high probability inline js -  break
-                        if (
-                            string.startswith("(function")
-                            or string.startswith("window.")
-                            or string.startswith("this.")
-                        ):
-                            break
-
-                        if keep_adding:
-                            s_out += string + " "
-                        else:
-                            break
+            if "jscontroller" in keys:
+                get_text = -1
 
-                    text += s_out
+            if get_text == 1:
+                # text handler - span[3]: the element has any text at all
+                if span[3]:
+                    text += self._span_text(span)
 
                     if text.strip():
-                        header_entry = []
-
                         if text not in unique_text_list:
-                            unique_text_list.append(text)
+                            unique_text_list.add(text)
                             content_found += 1
                             long_running_string += text + " "
                             last_text = text
@@ -319,35 +570,14 @@ class WebSiteParser:
                         else:
                             text_dupe_flag = True
 
-                        if "h1" in elements.name:
-                            header_entry = (counter, "h1", text)
-
-                        if "h2" in elements.name:
-                            header_entry = (counter, "h2", text)
-
-                        if "h3" in elements.name:
-                            header_entry = (counter, "h3", text)
+                        # exact tag name match - a substring test also caught e.g. <h100>
+                        header_list = header_lists.get(name)
 
-                        if header_entry:
+                        if header_list is not None:
                             if text not in unique_header_list:
                                 last_header = text
-                                header_text.append(header_entry)
-                                unique_header_list.append(text)
-
-            # if looking for images and links, then prioritize in attribution
-            if not self.text_only:
-                if img and img_success == 1:
-                    entry_type = "image"
-                else:
-                    if link:
-                        entry_type = "link"
-                    else:
-                        if text:
-                            entry_type = "text"
-                        else:
-                            content_found = 0
-            else:
-                entry_type = "text"
+                                header_list.append((counter, name, text))
+                                unique_header_list.add(text)
 
             if content_found > 0:
                 master_index = (self.url_main, self.url_link, counter)
@@ -368,17 +598,13 @@ class WebSiteParser:
                         len(text) > 50 and text not in all_text
                     ):
                         output.append(entry)
-                        all_text.append(text)
+                        all_text.add(text)
                         text = ""
 
         self.image_counter = img_counter
         self.internal_links = internal_links
         self.external_links = external_links
-        self.header_text = header_text
-
-        if header_text:
-            header_text_sorted = sorted(header_text, key=lambda x: x[1])
-            self.header_text = header_text_sorted
+        self.header_text = h1s + h2s + h3s
 
         self.core_index = output
         self.entries = len(output)
@@ -391,55 +617,29 @@ class WebSiteParser:
                 f"update: extracted {self.image_counter} images and saved @ path: {self.local_dir}"
             )
 
+        #   all images for this page have been fetched - release the pooled connections
+        self._prefetched_images = {}
+        self.close()
+
         if not output_index:
             return len(output), img_counter
 
         return self.core_index
 
+    def close(self):
+        """Closes the pooled http session - it is re-opened on demand if the parser is used again."""
+
+        self._session.close()
+
     def link_handler(self, elements):
-        """Handles processing of links found in main page content."""
-
-        link_out = ""
-        link_type = ""
-        js_skip = 0
-
-        if elements.attrs["href"].endswith(".js"):
-            link_out = elements.attrs["href"]
-            link_type = "js"
-            js_skip = 1
-
-        if elements.attrs["href"].endswith(".ico") or elements.attrs["href"].endswith(
-            ".ttf"
-        ):
-            link_out = elements.attrs["href"]
-            link_type = "other_formatting"
-            js_skip = 1
-
-        if elements.attrs["href"].endswith(".css"):
-            link_out = elements.attrs["href"]
-            link_type = "css"
-            js_skip = 1
-
-        if elements.attrs["href"].startswith(self.url_base):
-            # save relative link only
-            link_out = elements.attrs["href"][len(self.url_base) :]
-            link_type = "internal"
-
-        if str(elements.attrs["href"])[0] == "/":
-            # relative link
-            if elements.attrs["href"]:
-                if not elements.attrs["href"].startswith("//"):
-                    link_out = elements.attrs["href"]
-                    link_type = "internal"
-
-        if elements.attrs["href"].startswith("https://") and not elements.attrs[
-            "href"
-        ].startswith(self.url_base):
-            # website but not the url_base - external link
-            link_out = elements.attrs["href"]
-            link_type = "external"
-
-        return js_skip, link_out, link_type
+        """Handles processing of links found in main page content - elements is the attribute
+        dict of the element (or a BeautifulSoup tag)."""
+
+        href = elements.get("href")
+        if not href:
+            return 0, "", ""
+
+        return _classify_href(href, self.url_base)
 
     def image_handler(self, img_extension, elements, img_counter):
         """Handles and processes images found in main content."""
@@ -456,36 +656,15 @@ class WebSiteParser:
 
             if response_code == 200:
                 if self.save_images:
-                    # need to capture img type, e.g., .jpg
-                    img_type = ""
-                    if img_extension.endswith("png"):
-                        img_type = "png"
-                    if img_extension.endswith("jpg") or img_extension.endswith("jpeg"):
-                        img_type = "jpg"
-                    if img_extension.endswith("tiff"):
-                        img_type = "tiff"
-                    if img_extension.endswith("svg"):
-                        img_type = "svg"
-
-                    # secondary check if not at end - break off at '?' query string
-                    if img_type == "":
-                        original_img_name = img_extension.split("/")[-1]
-                        original_img_name = original_img_name.split("?")[0]
-                        if original_img_name.endswith("png"):
-                            img_type = "png"
-                        if original_img_name.endswith("jpg") or img_extension.endswith(
-                            "jpeg"
-                        ):
-                            img_type = "jpg"
-                        if original_img_name.endswith("tiff"):
-                            img_type = "tiff"
-                        if original_img_name.endswith("svg"):
-                            img_type = "svg"
+                    # need to capture img type, e.g., .jpg - extension with any '?' query
+                    # string broken off
+                    ext = img_extension.rsplit("?", 1)[0].rsplit(".", 1)[-1].lower()
+                    img_type = _IMG_TYPES.get(ext, "")
 
                     # only save image if valid img format found
-                    if img_type in ("png", "jpg", "svg", "tiff"):
+                    if img_type:
                         image_name = "image{}.{}".format(img_counter, img_type)
-                        fp = self.local_dir + image_name
+                        fp = self._local_dir_bytes + image_name.encode()
                         s = self._save_image(img_raw, fp)
                         success = 1
 
@@ -497,7 +676,7 @@ class WebSiteParser:
 
         except:
             logger.info(
-                f"warning: WebSite - could not retrieve potential image: {elements.attrs['src']}"
+                f"warning: WebSite - could not retrieve potential image: {elements.get('src')}"
             )
             success = -1
 
@@ -506,9 +685,14 @@ class WebSiteParser:
     def _save_image(self, img_raw, fp):
         """Internal utility to save images found."""
 
-        with open(fp, "wb") as f:
-            img_raw.decode_content = True
-            shutil.copyfileobj(img_raw, f)
+        # img_raw is the whole (decoded) body - raw fd open/write/close, no buffered file object
+        fd = os.open(fp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(img_raw)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
 
         return 0
 
@@ -535,13 +719,21 @@ class WebSiteParser:
 
     def _request_image(self, img_extension, img):
         """Retrieve images from links."""
-        try:
-            import requests
-        except ImportError:
-            raise Exception(
-                message="Exception: could not import `requests` library which is a required "
-                "dependency for web parsing."
-            )
+
+        full_url = self._image_full_url(img_extension)
+
+        if full_url in self._prefetched_images:
+            img_bytes, status_code = self._prefetched_images[full_url]
+            if isinstance(status_code, Exception):
+                raise status_code
+            return img_bytes, status_code, full_url
+
+        r = self._session.get(full_url, verify=self._verify)
+
+        return r.content, r.status_code, full_url
+
+    def _image_full_url(self, img_extension):
+        """Resolves an image src against the main url."""
 
         # relative link - refers back to main index page
         # check if url_main gives better performance than .url_base
@@ -561,55 +753,131 @@ class WebSiteParser:
 
                 full_url = url_base + url_ext
 
-        r = requests.get(full_url, stream=True, headers={"User-Agent": "Mozilla/5.0"})
+        return full_url
+
+    def _single_pass(self):
+        """One walk over the page that collects what the other passes need - the image
+        references and the link lists of get_all_links - so none of them walks it again.
+        """
+
+        if self._walked:
+            return
+
+        image_refs = []
+        internal_links = []
+        external_links = []
+        other_links = []
+
+        for position, name, attrs, _ in self._walk():
+
+            # (position of the element in the page, element, attribute holding the image)
+            if attrs.get("property") == "og:image" and "content" in attrs:
+                image_refs.append((position, name, attrs, "content"))
+            if "src" in attrs:
+                image_refs.append((position, name, attrs, "src"))
+
+            href = attrs.get("href")
+            if href:
+                found = 0
+                in_base = href.startswith(self.url_base)
+
+                if in_base:
+                    # save relative link only
+                    internal_links.append(href[len(self.url_base) :])
+                    found = 1
+
+                if href.startswith("/"):
+                    # relative link - skip double //
+                    if not href.startswith("//"):
+                        internal_links.append(href)
+                    found = 1
+
+                if href.startswith("https://") and not in_base:
+                    # website but not the url_base - external link
+                    external_links.append(href)
+                    found = 1
+
+                if found == 0:
+                    other_links.append(href)
+
+        self._image_refs = image_refs
+        self._all_links = (internal_links, external_links, other_links)
+        self._walked = True
+
+    def _collect_image_urls(self):
+        """Unique full urls of all og:image and src references on the page."""
+
+        self._single_pass()
+
+        urls = {}
+        for _, _, attrs, key in self._image_refs:
+            urls[self._image_full_url(attrs[key])] = None
+
+        return list(urls)
+
+    def _prefetch_images(self, urls, max_workers=16):
+        """Downloads all image urls concurrently - returns dict of full_url -> (bytes, status_code),
+        with the exception in place of the status code if the request failed."""
+
+        if not urls:
+            return {}
+
+        try:
+            import aiohttp
+        except ImportError:
+            aiohttp = None
+
+        if aiohttp is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # no event loop running in this thread - safe to start one
+                return asyncio.run(self._afetch_images(urls, aiohttp, max_workers))
+
+        # fallback - thread pool over the pooled session
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(urls, pool.map(self._fetch_image_bytes, urls)))
+
+    def _fetch_image_bytes(self, full_url):
+        """Downloads one image with the pooled session."""
+
+        try:
+            r = self._session.get(full_url, verify=self._verify)
+            return r.content, r.status_code
+        except Exception as e:
+            return b"", e
+
+    async def _afetch_images(self, urls, aiohttp, limit):
+        """Downloads all image urls with one aiohttp session, at most limit connections open."""
+
+        async def fetch(session, full_url):
+            try:
+                async with session.get(full_url) as r:
+                    return await r.read(), r.status
+            except Exception as e:
+                return b"", e
+
+        if self._verify:
+            connector = aiohttp.TCPConnector(limit=limit)
+        else:
+            connector = aiohttp.TCPConnector(limit=limit, ssl=False)
+        async with aiohttp.ClientSession(
+            connector=connector, headers={"User-Agent": "Mozilla/5.0"}
+        ) as session:
+            results = await asyncio.gather(*(fetch(session, u) for u in urls))
 
-        return r.raw, r.status_code, full_url
+        return dict(zip(urls, results))
 
     def get_all_links(self):
         """Utility to retrieve all links."""
 
         # note: not called by the main handler - kept as direct callable method
 
-        internal_links = []
-        external_links = []
-        other_links = []
-        js_links = []
-
-        for content in self.html:
-            found = 0
-            js = 0
-
-            if "href" in content.attrs:
-                if content.attrs["href"]:
-                    if content.attrs["href"].endswith(".js"):
-                        js_links.append(content.attrs["href"])
-                        js = 1
-
-                    if content.attrs["href"].startswith(self.url_base):
-                        # save relative link only
-                        out = content.attrs["href"][len(self.url_base) :]
-                        internal_links.append(out)
-                        found = 1
-
-                    if str(content.attrs["href"])[0] == "/":
-                        # relative link
-                        out = content.attrs["href"]
-                        if out:
-                            # skip double //
-                            if not out.startswith("//"):
-                                internal_links.append(out)
-                        found = 1
-
-                    if content.attrs["href"].startswith(
-                        "https://"
-                    ) and not content.attrs["href"].startswith(self.url_base):
-                        # website but not the url_base - external link
-                        out = content.attrs["href"]
-                        external_links.append(out)
-                        found = 1
-
-                    if found == 0:
-                        other_links.append(content.attrs["href"])
+        self._single_pass()
+
+        internal_links, external_links, other_links = (
+            list(links) for links in self._all_links
+        )
 
         self.internal_links = internal_links
         self.external_links = external_links
@@ -639,37 +907,125 @@ class WebSiteParser:
 
         # note: not called by main handler - kept as separate standalone method
 
-        counter = 0
-        for content in self.html:
-            counter += 1
-            if "src" in content.attrs:
-                if str(content).startswith("<img"):
-                    if content.attrs["src"]:
-                        try:
-                            img_raw, response_code, full_url = self._request_image(
-                                content, self.url_base
-                            )
+        self._single_pass()
+
+        saved = 0
+        for position, name, attrs, key in self._image_refs:
+            if key == "src" and name == "img":
+                if attrs["src"]:
+                    # numbered by position in the page plus images saved so far
+                    counter = position + saved
+                    try:
+                        img_raw, response_code, full_url = self._request_image(
+                            attrs, self.url_base
+                        )
 
-                            if response_code == 200:
-                                # need to capture img type, e.g., .jpg
-                                original_img_name = content.attrs["src"].split("/")[-1]
-                                original_img_name = original_img_name.split("?")[0]
-                                img_type = ""
-                                if original_img_name.endswith(".png"):
-                                    img_type = "png"
-                                if original_img_name.endswith(".jpg"):
-                                    img_type = "jpg"
-                                if original_img_name.endswith(".svg"):
-                                    img_type = "svg"
-                                if img_type == "":
-                                    img_type = original_img_name.split(".")[-1]
-
-                                fp = save_dir + "img{}.{}".format(counter, img_type)
-                                s = self._save_image(img_raw, fp)
-                                counter += 1
-                        except:
-                            logger.info(
-                                f"update: could not find image: {content.attrs['src']}"
-                            )
+                        if response_code == 200:
+                            # need to capture img type, e.g., .jpg
+                            original_img_name = attrs["src"].split("/")[-1]
+                            original_img_name = original_img_name.split("?")[0]
+                            img_type = ""
+                            if original_img_name.endswith(".png"):
+                                img_type = "png"
+                            if original_img_name.endswith(".jpg"):
+                                img_type = "jpg"
+                            if original_img_name.endswith(".svg"):
+                                img_type = "svg"
+                            if img_type == "":
+                                img_type = original_img_name.split(".")[-1]
+
+                            fp = save_dir + "img{}.{}".format(counter, img_type)
+                            s = self._save_image(img_raw, fp)
+                            saved += 1
+                    except:
+                        logger.info(f"update: could not find image: {attrs['src']}")
 
         return 0
+
+
+def _parse_page(url, page, local_file_path, parser_kwargs):
+    """Runs in a parse worker process - builds the parser from the downloaded page and
+    returns its core index."""
+
+    parts = urlsplit(url)
+    url_main = f"{parts.scheme}://{parts.netloc}"
+    link = url[len(url_main) :] or "/"
+
+    parser = WebSiteParser(
+        url_main,
+        link=link,
+        local_file_path=local_file_path,
+        page=page,
+        **parser_kwargs,
+    )
+
+    return parser.website_main_processor(0)
+
+
+def parse_many(urls, max_workers=8, local_file_path=None, **parser_kwargs):
+    """Parses many web pages - downloads run on a thread pool and each page is handed to a
+    process pool for the (GIL-bound) BeautifulSoup walk as soon as it arrives, so network
+    waits overlap with parsing and parsing uses all cores.
+
+    Returns the core index of each url, in the order of urls ([] if the page failed).
+    Each page keeps its archived html and images in its own sub-folder page_{i}/."""
+
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        raise LLMWareException(
+            message="Exception: to use parse_many requires additional Python "
+            "dependencies via pip install:  "
+            "\n -- pip3 install requests"
+        )
+
+    if not local_file_path:
+        local_file_path = os.path.join(Config.get_path(), "process_website/")
+
+    verify = not parser_kwargs.get("unverified_context", False)
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    def fetch(url):
+        response = session.get(url, verify=verify)
+        response.raise_for_status()
+        return response.content
+
+    results = [[] for _ in urls]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as fetch_pool, ProcessPoolExecutor(
+        max_workers=max_workers
+    ) as parse_pool:
+        fetches = {fetch_pool.submit(fetch, url): i for i, url in enumerate(urls)}
+        parses = {}
+
+        for future in as_completed(fetches):
+            i = fetches[future]
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.warning(
+                    f"warning: parse_many - could not retrieve {urls[i]}: {e}"
+                )
+                continue
+
+            page_dir = os.path.join(local_file_path, f"page_{i}/")
+            parses[
+                parse_pool.submit(_parse_page, urls[i], page, page_dir, parser_kwargs)
+            ] = i
+
+        for future in as_completed(parses):
+            i = parses[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logger.warning(f"warning: parse_many - could not parse {urls[i]}: {e}")
+
+    session.close()
+
+    return results